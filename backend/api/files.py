@@ -55,9 +55,10 @@ async def upload_resume(
                 detail="Filename is required"
             )
         
-        # Read file content
+        # Read file content; anything past the size limit is left unread,
+        # so an oversized upload is rejected without buffering all of it
         try:
-            file_content = await file.read()
+            file_content = await file.read(file_service.MAX_FILE_SIZE + 1)
         except Exception as e:
             logger.error(f"Failed to read uploaded file: {e}")
             raise HTTPException(
@@ -67,7 +68,7 @@ async def upload_resume(
         
         # Save file with validation
         try:
-            file_info = file_service.save_file(
+            file_info = await file_service.save_file_async(
                 file_content=file_content,
                 filename=file.filename,
                 content_type=file.content_type or "application/octet-stream"
@@ -91,7 +92,7 @@ async def upload_resume(
         
         if extract_immediately:
             try:
-                extracted_content = file_service.extract_text(file_info)
+                extracted_content = await file_service.extract_text_async(file_info)
                 message = f"File uploaded and text extracted successfully ({extracted_content.word_count} words)"
                 
                 # Store extracted content in session or temporary storage
@@ -25,6 +25,7 @@ from api.middleware import AuthenticationMiddleware
 from api.auth import router as auth_router
 from api.files import router as files_router
 from api.analysis import router as analysis_router
+from services.claude_service import close_claude_service
 
 # Configure logging
 logging.basicConfig(
@@ -86,6 +87,9 @@ async def lifespan(app: FastAPI):
         app.state.rate_limiter.cleanup_old_entries()
         logger.info("✅ Rate limiter cleanup completed")
     
+    await close_claude_service()
+    logger.info("✅ Claude client closed")
+    
     logger.info("👋 CareerCraft AI backend shutdown complete")
 
 
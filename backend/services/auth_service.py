@@ -5,47 +5,236 @@ Handles JWT token management and user session authentication.
 """
 
 import jwt
+import base64
+import hashlib
+import heapq
+import hmac
+import json
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from functools import lru_cache
 import logging
 
+from jwt.algorithms import HMACAlgorithm
+from jwt.api_jws import PyJWS
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from config import get_config, SecurityConfig
+from utils.compat import DATACLASS_SLOTS
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+class _KeyedHMACAlgorithm(HMACAlgorithm):
+    """
+    HS256 bound to one secret. The keyed HMAC state is prepared once and
+    copied for each signature, skipping the per-call key setup; other keys
+    fall back to the stock implementation. Signatures are identical to
+    PyJWT's HS256.
+    """
+    
+    def __init__(self, key: bytes):
+        super().__init__(HMACAlgorithm.SHA256)
+        self._key = key
+        self._keyed_hmac = hmac.new(key, digestmod=hashlib.sha256)
+    
+    def sign(self, msg: bytes, key: bytes) -> bytes:
+        if key != self._key:
+            return super().sign(msg, key)
+        mac = self._keyed_hmac.copy()
+        mac.update(msg)
+        return mac.digest()
+
+
+class _SessionJWT(jwt.PyJWT):
+    """
+    PyJWT codec that signs and verifies through its own PyJWS instance, so
+    the keyed HS256 algorithm is scoped to one token manager instead of
+    PyJWT's process-wide algorithm registry.
+    
+    ``encode``/``decode_complete`` mirror PyJWT 2.8 with the JWS calls
+    pointed at the private instance; claim validation still goes through
+    PyJWT's private ``_validate_claims``, so re-check these when upgrading
+    the pinned PyJWT version. Payloads are expected to carry integer time
+    claims (no datetime conversion on encode).
+    """
+    
+    def __init__(self, key: bytes):
+        super().__init__()
+        self._jws = PyJWS(algorithms=["HS256"])
+        self._jws.unregister_algorithm("HS256")
+        self._jws.register_algorithm("HS256", _KeyedHMACAlgorithm(key))
+    
+    def encode(
+        self,
+        payload: Dict[str, Any],
+        key: bytes,
+        algorithm: Optional[str] = "HS256",
+        headers: Optional[Dict[str, Any]] = None,
+        json_encoder=None,
+        sort_headers: bool = True
+    ) -> str:
+        json_payload = self._encode_payload(payload, headers=headers, json_encoder=json_encoder)
+        return self._jws.encode(json_payload, key, algorithm, headers, json_encoder, sort_headers=sort_headers)
+    
+    def decode_complete(
+        self,
+        jwt: str,
+        key: bytes = b"",
+        algorithms: Optional[List[str]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        verify: Optional[bool] = None,
+        detached_payload: Optional[bytes] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        leeway: float = 0
+    ) -> Dict[str, Any]:
+        options = dict(options or {})
+        options.setdefault("verify_signature", True)
+        if not options["verify_signature"]:
+            for claim_option in ("verify_exp", "verify_nbf", "verify_iat", "verify_aud", "verify_iss"):
+                options.setdefault(claim_option, False)
+        
+        decoded = self._jws.decode_complete(
+            jwt,
+            key=key,
+            algorithms=algorithms,
+            options=options,
+            detached_payload=detached_payload
+        )
+        payload = self._decode_payload(decoded)
+        self._validate_claims(
+            payload, {**self.options, **options}, audience=audience, issuer=issuer, leeway=leeway
+        )
+        decoded["payload"] = payload
+        return decoded
+
+
+class _OrjsonPyJWT(_SessionJWT):
+    """
+    Session JWT codec that (de)serializes claim payloads with orjson.
+    
+    Overrides PyJWT's private ``_encode_payload``/``_decode_payload``
+    methods, which are not a stable API; re-check them when upgrading the
+    pinned PyJWT version.
+    """
+    
+    def _encode_payload(self, payload, headers=None, json_encoder=None) -> bytes:
+        if json_encoder is not None:
+            return super()._encode_payload(payload, headers=headers, json_encoder=json_encoder)
+        return orjson.dumps(payload)
+    
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Any:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+# JWT codec class for token managers; uses orjson when installed
+_JWTCodec = _OrjsonPyJWT if ORJSON_AVAILABLE else _SessionJWT
+
+
+@lru_cache(maxsize=1)
+def _default_timeout_minutes() -> int:
+    """Get the configured session timeout, resolved once per process"""
+    try:
+        return get_config().security.session_timeout
+    except Exception:
+        # Fallback for testing or when config is not available
+        return 30
+
+
+@dataclass(init=False, **DATACLASS_SLOTS)
 class SessionData:
-    """User session data"""
+    """
+    User session data.
+    
+    Timestamps are stored as integer unix seconds (``created_ts``/
+    ``expires_ts``), the same representation used in the JWT payload;
+    ``created_at``/``expires_at`` are materialized as datetime objects only
+    when read.
+    """
     session_id: str
-    user_id: Optional[str] = None
-    api_key: Optional[str] = None
-    created_at: datetime = None
-    expires_at: datetime = None
-    permissions: list = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now(timezone.utc)
-        if self.expires_at is None:
-            try:
-                config = get_config()
-                timeout_minutes = config.security.session_timeout
-            except:
-                # Fallback for testing or when config is not available
-                timeout_minutes = 30
-            self.expires_at = self.created_at + timedelta(minutes=timeout_minutes)
-        if self.permissions is None:
-            self.permissions = []
+    user_id: Optional[str]
+    api_key: Optional[str]
+    permissions: list
+    created_ts: int = field(repr=False)
+    expires_ts: int = field(repr=False)
+    _created_iso: Optional[Tuple[int, str]] = field(repr=False, compare=False)
+    
+    def __init__(
+        self,
+        session_id: str,
+        user_id: Optional[str] = None,
+        api_key: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        expires_at: Optional[datetime] = None,
+        permissions: Optional[list] = None,
+        *,
+        created_ts: Optional[int] = None,
+        expires_ts: Optional[int] = None
+    ):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.api_key = api_key
+        self.permissions = [] if permissions is None else permissions
+        if created_at is not None:
+            created_ts = int(created_at.timestamp())
+        elif created_ts is None:
+            created_ts = int(time.time())
+        if expires_at is not None:
+            expires_ts = int(expires_at.timestamp())
+        elif expires_ts is None:
+            expires_ts = created_ts + _default_timeout_minutes() * 60
+        self.created_ts = created_ts
+        self.expires_ts = expires_ts
+        self._created_iso = None
+    
+    @property
+    def created_at(self) -> datetime:
+        """Session creation time"""
+        return datetime.fromtimestamp(self.created_ts, tz=timezone.utc)
+    
+    @created_at.setter
+    def created_at(self, value: datetime) -> None:
+        self.created_ts = int(value.timestamp())
+    
+    @property
+    def expires_at(self) -> datetime:
+        """Session expiration time"""
+        return datetime.fromtimestamp(self.expires_ts, tz=timezone.utc)
+    
+    @expires_at.setter
+    def expires_at(self, value: datetime) -> None:
+        self.expires_ts = int(value.timestamp())
+    
+    def created_at_isoformat(self) -> str:
+        """Get creation time as ISO-8601 string (formatted once per creation time)"""
+        cached = self._created_iso
+        if cached is None or cached[0] != self.created_ts:
+            cached = self._created_iso = (self.created_ts, self.created_at.isoformat())
+        return cached[1]
     
     def is_expired(self) -> bool:
         """Check if session has expired"""
-        return datetime.now(timezone.utc) > self.expires_at
+        return time.time() > self.expires_ts
     
     def time_until_expiry(self) -> timedelta:
         """Get time remaining until session expires"""
-        return self.expires_at - datetime.now(timezone.utc)
+        return timedelta(seconds=self.expires_ts - time.time())
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JWT payload"""
@@ -53,11 +242,23 @@ class SessionData:
             'session_id': self.session_id,
             'user_id': self.user_id,
             'api_key': self.api_key,
-            'created_at': self.created_at.isoformat(),
+            'created_at': self.created_at_isoformat(),
             'expires_at': self.expires_at.isoformat(),
             'permissions': self.permissions
         }
     
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> 'SessionData':
+        """Create SessionData from a decoded JWT payload (integer timestamps)"""
+        return cls(
+            session_id=payload['session_id'],
+            user_id=payload.get('user_id'),
+            api_key=payload.get('api_key'),
+            permissions=payload.get('permissions', []),
+            created_ts=payload['created_at'],
+            expires_ts=payload['expires_at']
+        )
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'SessionData':
         """Create SessionData from dictionary"""
@@ -95,6 +296,13 @@ class JWTTokenManager:
     def __init__(self, security_config: Optional[SecurityConfig] = None):
         self.config = security_config or get_config().security
         self.algorithm = "HS256"
+        # Prepared HMAC key, encoded once instead of on every encode/decode
+        self._key_bytes = self.config.jwt_secret.encode('utf-8')
+        self._codec = _JWTCodec(self._key_bytes)
+        # Decode arguments, built once rather than per call
+        self._algorithms = [self.algorithm]
+        self._decode_options_strict = {"verify_exp": True, "require": ["exp", "iat", "session_id"]}
+        self._decode_options_refresh = {"verify_exp": False}  # Don't verify expiration for refresh
     
     def generate_token(self, session_data: SessionData) -> str:
         """
@@ -107,28 +315,26 @@ class JWTTokenManager:
             JWT token string
         """
         try:
-            # Create payload with proper JWT-compatible types
+            session_id = session_data.session_id
+            expires_ts = session_data.expires_ts
+            
+            # Session data plus standard JWT claims, built in one literal
             payload = {
-                'session_id': session_data.session_id,
+                'session_id': session_id,
                 'user_id': session_data.user_id,
                 'api_key': session_data.api_key,
-                'created_at': int(session_data.created_at.timestamp()),
-                'expires_at': int(session_data.expires_at.timestamp()),
-                'permissions': session_data.permissions or []
+                'created_at': session_data.created_ts,
+                'expires_at': expires_ts,
+                'permissions': session_data.permissions or [],
+                'iat': int(time.time()),                          # Issued at
+                'exp': expires_ts,                                # Expiration
+                'iss': 'careercraft-ai',                          # Issuer
+                'sub': session_id                                 # Subject
             }
             
-            # Add standard JWT claims
-            now = datetime.now(timezone.utc)
-            payload.update({
-                'iat': int(now.timestamp()),                      # Issued at
-                'exp': int(session_data.expires_at.timestamp()),  # Expiration
-                'iss': 'careercraft-ai',                         # Issuer
-                'sub': session_data.session_id                   # Subject
-            })
-            
-            token = jwt.encode(
+            token = self._codec.encode(
                 payload,
-                self.config.jwt_secret,
+                self._key_bytes,
                 algorithm=self.algorithm
             )
             
@@ -154,30 +360,18 @@ class JWTTokenManager:
             TokenExpiredError: If token has expired
         """
         try:
-            # Decode and validate token
-            payload = jwt.decode(
+            # Decode and validate token; PyJWT enforces expiry, issuer and
+            # required claims in a single pass
+            payload = self._codec.decode(
                 token,
-                self.config.jwt_secret,
-                algorithms=[self.algorithm],
-                options={"verify_exp": True}
+                self._key_bytes,
+                algorithms=self._algorithms,
+                options=self._decode_options_strict,
+                issuer='careercraft-ai'
             )
             
-            # Convert timestamps back to datetime objects
-            session_dict = {
-                'session_id': payload['session_id'],
-                'user_id': payload.get('user_id'),
-                'api_key': payload.get('api_key'),
-                'created_at': datetime.fromtimestamp(payload['created_at'], tz=timezone.utc).isoformat(),
-                'expires_at': datetime.fromtimestamp(payload['expires_at'], tz=timezone.utc).isoformat(),
-                'permissions': payload.get('permissions', [])
-            }
-            
             # Extract session data
-            session_data = SessionData.from_dict(session_dict)
-            
-            # Additional expiration check
-            if session_data.is_expired():
-                raise TokenExpiredError("Session has expired")
+            session_data = SessionData.from_payload(payload)
             
             logger.debug(f"Validated JWT token for session {session_data.session_id}")
             return session_data
@@ -204,31 +398,20 @@ class JWTTokenManager:
         """
         try:
             # Validate current token (allow expired for refresh)
-            payload = jwt.decode(
+            payload = self._codec.decode(
                 current_token,
-                self.config.jwt_secret,
-                algorithms=[self.algorithm],
-                options={"verify_exp": False}  # Don't verify expiration for refresh
+                self._key_bytes,
+                algorithms=self._algorithms,
+                options=self._decode_options_refresh
             )
             
-            # Convert timestamps back to datetime objects
-            session_dict = {
-                'session_id': payload['session_id'],
-                'user_id': payload.get('user_id'),
-                'api_key': payload.get('api_key'),
-                'created_at': datetime.fromtimestamp(payload['created_at'], tz=timezone.utc).isoformat(),
-                'expires_at': datetime.fromtimestamp(payload['expires_at'], tz=timezone.utc).isoformat(),
-                'permissions': payload.get('permissions', [])
-            }
-            
-            # Create new session with extended expiration
-            session_data = SessionData.from_dict(session_dict)
-            # Extend expiration by the full session timeout from now
-            session_data.expires_at = datetime.now(timezone.utc) + timedelta(
-                minutes=self.config.session_timeout
-            )
-            # Force a different creation time to ensure token difference
-            session_data.created_at = datetime.now(timezone.utc)
+            # Create new session with extended expiration: the full session
+            # timeout from now, with a fresh creation time to ensure token
+            # difference
+            session_data = SessionData.from_payload(payload)
+            now_ts = int(time.time())
+            session_data.created_ts = now_ts
+            session_data.expires_ts = now_ts + self.config.session_timeout * 60
             
             # Generate new token
             new_token = self.generate_token(session_data)
@@ -254,30 +437,161 @@ class JWTTokenManager:
             Token payload dictionary
         """
         try:
-            return jwt.decode(
-                token,
-                options={"verify_signature": False, "verify_exp": False}
-            )
+            # Only the middle segment is needed; skip PyJWT's header parsing
+            # and algorithm dispatch entirely
+            _, payload_b64, _ = token.split('.')
+            padded = payload_b64 + '=' * (-len(payload_b64) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            return payload if isinstance(payload, dict) else {}
         except Exception as e:
-            logger.error(f"Failed to decode token: {e}")
+            # Also used to peek at every token while revoked sessions are
+            # outstanding, so malformed input isn't logged as an error
+            logger.debug(f"Failed to decode token: {e}")
             return {}
 
 
+class _SessionStore(MutableMapping):
+    """
+    Session mapping that schedules every stored session on a min-heap of
+    ``(expires_ts, session_id)`` so expired sessions can be found without
+    scanning the whole store.
+    
+    ``scheduled`` records the newest heap entry per session, so storing a
+    session whose expiry is already on the heap pushes nothing and older
+    entries are recognised as stale. Heap entries are removed lazily.
+    """
+    
+    def __init__(self):
+        self._sessions: Dict[str, SessionData] = {}
+        self.expiry_heap: List[Tuple[int, str]] = []
+        self.scheduled: Dict[str, int] = {}
+    
+    def __getitem__(self, session_id: str) -> SessionData:
+        return self._sessions[session_id]
+    
+    def __setitem__(self, session_id: str, session_data: SessionData) -> None:
+        self._sessions[session_id] = session_data
+        self.schedule(session_id, session_data.expires_ts)
+    
+    def __delitem__(self, session_id: str) -> None:
+        del self._sessions[session_id]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sessions)
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._sessions
+    
+    def get(self, session_id: str, default: Optional[SessionData] = None) -> Optional[SessionData]:
+        return self._sessions.get(session_id, default)
+    
+    def copy(self) -> Dict[str, SessionData]:
+        """Shallow copy of the stored sessions as a plain dict"""
+        return self._sessions.copy()
+    
+    def schedule(self, session_id: str, expires_ts: int) -> None:
+        """Put a session's expiry on the heap unless it is already scheduled"""
+        if self.scheduled.get(session_id) != expires_ts:
+            self.scheduled[session_id] = expires_ts
+            heapq.heappush(self.expiry_heap, (expires_ts, session_id))
+
+
+def _session_info(session: SessionData) -> Dict[str, Any]:
+    """Format a session for admin listings"""
+    return {
+        'user_id': session.user_id,
+        'api_key': session.api_key,
+        'created_at': session.created_at_isoformat(),
+        'expires_at': session.expires_at.isoformat(),
+        'time_remaining': str(session.time_until_expiry()),
+        'permissions': session.permissions
+    }
+
+
 class SessionManager:
     """
     Session management for active user sessions.
     
+    Reads (validation, lookups) go straight to the session dictionary;
+    writes are serialized with a lock so concurrent create/refresh/revoke/
+    cleanup calls from worker threads don't race.
+    
     Note: In production, use Redis or database for session storage
     across multiple application instances.
     """
     
     def __init__(self, jwt_manager: Optional[JWTTokenManager] = None):
-        self.active_sessions: Dict[str, SessionData] = {}
+        self.active_sessions = _SessionStore()
+        self._lock = threading.Lock()
+        # Revoked session IDs whose tokens have not expired yet, mapped to
+        # that expiry and checked before the verified decode so replayed
+        # tokens are rejected cheaply. Entries are dropped via the heap once
+        # the tokens expire, so the map is empty when no revoked token can
+        # still validate.
+        self._revoked: Dict[str, int] = {}
+        self._revoked_heap: List[Tuple[int, str]] = []
         try:
             self.jwt_manager = jwt_manager or JWTTokenManager()
         except:
             # Fallback for testing without config
             self.jwt_manager = None
+        
+        # Pick the token strategy once; the JWT manager doesn't change after
+        # construction, so the hot paths don't re-check it per call
+        if self.jwt_manager:
+            self._issue_token = self._issue_jwt_token
+            self._decode_token = self._decode_jwt_token
+            self._refresh_token = self._refresh_jwt_token
+        else:
+            self._issue_token = self._issue_test_token
+            self._decode_token = self._decode_test_token
+            self._refresh_token = self._refresh_unavailable
+    
+    def _issue_jwt_token(self, session_data: SessionData) -> str:
+        return self.jwt_manager.generate_token(session_data)
+    
+    def _issue_test_token(self, session_data: SessionData) -> str:
+        # Fallback for testing
+        return f"test-token-{session_data.session_id}"
+    
+    def _decode_jwt_token(self, token: str) -> SessionData:
+        if self._revoked:
+            now = int(time.time())
+            heap = self._revoked_heap
+            if heap and heap[0][0] < now:
+                with self._lock:
+                    self._prune_revoked(now)
+            if self._revoked:
+                session_id = self.jwt_manager.decode_token_unsafe(token).get('session_id')
+                if session_id in self._revoked:
+                    raise AuthenticationError("Session has been revoked")
+        return self.jwt_manager.validate_token(token)
+    
+    def _prune_revoked(self, cutoff: int) -> None:
+        """Forget revoked sessions whose tokens expired before cutoff (call with the lock held)"""
+        heap = self._revoked_heap
+        while heap and heap[0][0] < cutoff:
+            expires_ts, session_id = heapq.heappop(heap)
+            if self._revoked.get(session_id) == expires_ts:
+                del self._revoked[session_id]
+    
+    def _decode_test_token(self, token: str) -> SessionData:
+        # Fallback for testing - extract session_id from test token
+        if not token.startswith("test-token-"):
+            raise AuthenticationError("JWT manager not available")
+        session_data = self.active_sessions.get(token[len("test-token-"):])
+        if not session_data:
+            raise AuthenticationError("Session not found")
+        return session_data
+    
+    def _refresh_jwt_token(self, current_token: str) -> Tuple[str, SessionData]:
+        return self.jwt_manager.refresh_token(current_token)
+    
+    def _refresh_unavailable(self, current_token: str) -> Tuple[str, SessionData]:
+        raise AuthenticationError("JWT manager not available for refresh")
     
     def create_session(
         self,
@@ -306,14 +620,12 @@ class SessionManager:
         )
         
         # Store session
-        self.active_sessions[session_id] = session_data
+        with self._lock:
+            self.active_sessions[session_id] = session_data
+            self._revoked.pop(session_id, None)
         
         # Generate JWT token
-        if self.jwt_manager:
-            token = self.jwt_manager.generate_token(session_data)
-        else:
-            # Fallback for testing
-            token = f"test-token-{session_id}"
+        token = self._issue_token(session_data)
         
         logger.info(f"Created session {session_id} for user {user_id}")
         return token, session_data
@@ -329,28 +641,14 @@ class SessionManager:
             SessionData object
         """
         # Validate JWT token
-        if self.jwt_manager:
-            session_data = self.jwt_manager.validate_token(token)
-        else:
-            # Fallback for testing - extract session_id from test token
-            if token.startswith("test-token-"):
-                session_id = token.replace("test-token-", "")
-                session_data = self.active_sessions.get(session_id)
-                if not session_data:
-                    raise AuthenticationError("Session not found")
-            else:
-                raise AuthenticationError("JWT manager not available")
+        session_data = self._decode_token(token)
         
-        # Check if session exists in active sessions
-        stored_session = self.active_sessions.get(session_data.session_id)
-        if not stored_session:
+        # Check if session exists in active sessions. This is a pure read:
+        # refresh_session is the only path that updates stored session data.
+        if session_data.session_id not in self.active_sessions:
             logger.warning(f"Session {session_data.session_id} not found in active sessions")
             raise AuthenticationError("Session not found")
         
-        # Update stored session if token data is newer
-        if session_data.expires_at > stored_session.expires_at:
-            self.active_sessions[session_data.session_id] = session_data
-        
         return session_data
     
     def refresh_session(self, current_token: str) -> Tuple[str, SessionData]:
@@ -363,13 +661,11 @@ class SessionManager:
         Returns:
             Tuple of (new_token, session_data)
         """
-        if self.jwt_manager:
-            new_token, session_data = self.jwt_manager.refresh_token(current_token)
-        else:
-            raise AuthenticationError("JWT manager not available for refresh")
+        new_token, session_data = self._refresh_token(current_token)
         
         # Update stored session
-        self.active_sessions[session_data.session_id] = session_data
+        with self._lock:
+            self.active_sessions[session_data.session_id] = session_data
         
         return new_token, session_data
     
@@ -383,11 +679,17 @@ class SessionManager:
         Returns:
             True if session was revoked
         """
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        with self._lock:
+            session_data = self.active_sessions.pop(session_id, None)
+            revoked = session_data is not None
+            if revoked:
+                # Tokens for the session stop validating at its expiry
+                self._revoked[session_id] = session_data.expires_ts
+                heapq.heappush(self._revoked_heap, (session_data.expires_ts, session_id))
+            self._prune_revoked(int(time.time()))
+        if revoked:
             logger.info(f"Revoked session {session_id}")
-            return True
-        return False
+        return revoked
     
     def cleanup_expired_sessions(self) -> int:
         """
@@ -396,18 +698,40 @@ class SessionManager:
         Returns:
             Number of sessions cleaned up
         """
-        expired_sessions = [
-            session_id for session_id, session_data in self.active_sessions.items()
-            if session_data.is_expired()
-        ]
+        # Integer cutoff so every heap comparison is int-to-int
+        cutoff = int(time.time())
+        store = self.active_sessions
+        heap = store.expiry_heap
+        scheduled = store.scheduled
+        heappop = heapq.heappop
+        cleaned_count = 0
         
-        for session_id in expired_sessions:
-            del self.active_sessions[session_id]
+        # Only entries due for expiry are popped; entries superseded by a
+        # newer schedule, and those of revoked sessions, are discarded as
+        # they surface
+        with self._lock:
+            while heap and heap[0][0] < cutoff:
+                expires_ts, session_id = heappop(heap)
+                if scheduled.get(session_id) != expires_ts:
+                    continue
+                session_data = store.get(session_id)
+                if session_data is None:
+                    # Revoked session; nothing left to remove
+                    del scheduled[session_id]
+                    continue
+                if session_data.expires_ts < cutoff:
+                    del store[session_id]
+                    del scheduled[session_id]
+                    cleaned_count += 1
+                else:
+                    # Expiry was extended in place; reschedule at the new time
+                    store.schedule(session_id, session_data.expires_ts)
+            self._prune_revoked(cutoff)
         
-        if expired_sessions:
-            logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
+        if cleaned_count:
+            logger.info(f"Cleaned up {cleaned_count} expired sessions")
         
-        return len(expired_sessions)
+        return cleaned_count
     
     def get_session_info(self, session_id: str) -> Optional[SessionData]:
         """
@@ -428,16 +752,14 @@ class SessionManager:
         Returns:
             Dictionary of session_id -> session_info
         """
+        # Snapshot under the lock so concurrent writers can't resize the
+        # store mid-iteration
+        with self._lock:
+            sessions = self.active_sessions.copy()
+        
         return {
-            session_id: {
-                'user_id': session.user_id,
-                'api_key': session.api_key,
-                'created_at': session.created_at.isoformat(),
-                'expires_at': session.expires_at.isoformat(),
-                'time_remaining': str(session.time_until_expiry()),
-                'permissions': session.permissions
-            }
-            for session_id, session in self.active_sessions.items()
+            session_id: _session_info(session)
+            for session_id, session in sessions.items()
         }
 
 
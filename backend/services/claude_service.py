@@ -7,20 +7,52 @@ company research, and resume enhancement tasks.
 
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any, AsyncGenerator
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Any, AsyncGenerator, AsyncIterator, Awaitable, Deque, Tuple, TypeVar
+from types import MappingProxyType
+from collections import OrderedDict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field, replace
 from enum import Enum
+import functools
+import hashlib
+import inspect
 import json
+import random
+import re
+import string
+import threading
 import time
 
 import anthropic
-from anthropic import Anthropic, AsyncAnthropic
-from anthropic.types import MessageParam
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+from anthropic.lib.streaming import AsyncMessageStream
+from anthropic.types import Message, MessageParam
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Claude often wraps JSON answers in a ```json fence despite the prompt
+_JSON_FENCE = re.compile(r"^\s*```(?:json)?[^\n]*\n?|\n?```\s*$")
+
+
+def _loads_json(text: str) -> Any:
+    """Decode a JSON response, tolerating a surrounding code fence"""
+    text = _JSON_FENCE.sub("", text)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
 class PromptType(Enum):
     """Types of prompts for different analysis tasks"""
@@ -31,56 +63,9 @@ class PromptType(Enum):
     SKILLS_ANALYSIS = "skills_analysis"
 
 
-@dataclass
-class AnalysisResult:
-    """Result from Claude API analysis"""
-    prompt_type: PromptType
-    response_text: str
-    usage_tokens: int
-    processing_time: float
-    metadata: Dict[str, Any]
-
-
-class ClaudeAPIError(Exception):
-    """Raised when Claude API encounters an error"""
-    pass
-
-
-class ClaudeService:
-    """Service for interacting with Claude API"""
-    
-    # Model configuration
-    DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
-    MAX_TOKENS = 4000
-    TEMPERATURE = 0.7
-    
-    # Rate limiting
-    REQUESTS_PER_MINUTE = 50
-    TOKENS_PER_MINUTE = 40000
-    
-    def __init__(self):
-        """Initialize Claude service"""
-        self.config = get_config()
-        
-        # Initialize clients
-        try:
-            self.sync_client = Anthropic(api_key=self.config.claude.api_key)
-            self.async_client = AsyncAnthropic(api_key=self.config.claude.api_key)
-        except Exception as e:
-            logger.error(f"Failed to initialize Claude clients: {e}")
-            raise ClaudeAPIError(f"Claude API initialization failed: {e}")
-        
-        # Rate limiting tracking
-        self._request_times = []
-        self._token_usage = []
-        
-        # Load prompt templates
-        self.prompts = self._load_prompt_templates()
-    
-    def _load_prompt_templates(self) -> Dict[PromptType, str]:
-        """Load prompt templates for different analysis types"""
-        return {
-            PromptType.JOB_ANALYSIS: """
+# Prompt templates for each analysis type, built once at import
+_PROMPT_TEMPLATES: Mapping[PromptType, str] = MappingProxyType({
+    PromptType.JOB_ANALYSIS: """
 You are an expert job market analyst. Analyze the following job description and extract key information in a structured format.
 
 Job Description:
@@ -124,7 +109,7 @@ Please provide a comprehensive analysis including:
 Format your response as a JSON object with clear sections. Be thorough but concise.
 """,
 
-            PromptType.COMPANY_RESEARCH: """
+    PromptType.COMPANY_RESEARCH: """
 You are a business research specialist. Based on the company information provided, create a comprehensive company profile.
 
 Company Name: {company_name}
@@ -171,7 +156,7 @@ Please research and provide:
 Format as a JSON object. If specific information isn't available, indicate that clearly.
 """,
 
-            PromptType.RESUME_ANALYSIS: """
+    PromptType.RESUME_ANALYSIS: """
 You are a professional resume consultant and career advisor. Analyze the provided resume against the job requirements and provide comprehensive feedback.
 
 Resume Content:
@@ -221,7 +206,7 @@ Please provide:
 Format as a JSON object with actionable recommendations.
 """,
 
-            PromptType.COVER_LETTER: """
+    PromptType.COVER_LETTER: """
 You are an expert cover letter writer with extensive experience in various industries. Create a compelling, personalized cover letter.
 
 Job Description:
@@ -258,7 +243,7 @@ Requirements:
 Provide both the cover letter text and a brief analysis of the approach taken.
 """,
 
-            PromptType.SKILLS_ANALYSIS: """
+    PromptType.SKILLS_ANALYSIS: """
 You are a skills assessment expert and career development specialist. Analyze the skills gap between current capabilities and job requirements.
 
 Current Skills (from resume):
@@ -304,57 +289,368 @@ Please provide:
 
 Format as a JSON object with specific, actionable recommendations.
 """
-        }
+})
+
+
+
+def _compile_template(template: str) -> Callable[..., str]:
+    """
+    Pre-parse a str.format template into a render function.
+    
+    The template is split into (literal, field) pairs once, so rendering is
+    a single join instead of re-parsing the template on every request. Only
+    plain {name} fields are supported.
+    
+    Args:
+        template: Template using str.format field syntax
+        
+    Returns:
+        Function taking the fields as keyword arguments
+    """
+    parts = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported template field: {field_name}")
+        parts.append((literal, field_name))
+    parts = tuple(parts)
+    
+    def render(**fields: Any) -> str:
+        return "".join([
+            literal if field_name is None else literal + str(fields[field_name])
+            for literal, field_name in parts
+        ])
+    
+    return render
+
+
+# Pre-compiled renderers for _PROMPT_TEMPLATES
+_PROMPT_RENDERERS: Mapping[PromptType, Callable[..., str]] = MappingProxyType({
+    prompt_type: _compile_template(template) for prompt_type, template in _PROMPT_TEMPLATES.items()
+})
+
+# Prompt fill-ins used when optional inputs are missing
+_DEFAULT_FOCUS_AREAS: Tuple[str, ...] = ("relevant experience", "technical skills")
+_DEFAULT_FOCUS_STR = ", ".join(_DEFAULT_FOCUS_AREAS)
+_NO_CONTEXT_STR = "No additional context provided"
+_NO_SKILLS_STR = "No skills specified"
+
+# Several resumes screened against one set of job requirements in a single
+# request; each <resume> block is analyzed like PromptType.RESUME_ANALYSIS
+_BULK_RESUME_RENDERER = _compile_template("""
+You are a professional resume consultant and career advisor. Analyze each of the {count} resumes below against the job requirements.
+
+Job Requirements:
+{job_requirements}
+
+Resumes:
+{resumes}
+
+For every resume provide:
+
+1. **Overall Assessment**: resume strength score (1-10), job match percentage, key strengths, major weaknesses
+2. **Skills Analysis**: matching skills, missing critical skills, skills to emphasize, skills to add or learn
+3. **Experience Alignment**: relevant highlights, experience gaps, positioning advice, achievements to quantify
+4. **ATS Optimization**: keywords to add and formatting issues
+5. **Improvement Recommendations**: top priority changes and quick wins
+
+Respond with only a JSON array of exactly {count} objects, one per resume in index order, each with an "index" field matching the resume's index attribute.
+""")
+
+@dataclass
+class AnalysisResult:
+    """Result from Claude API analysis"""
+    prompt_type: PromptType
+    response_text: str
+    usage_tokens: int
+    processing_time: float
+    metadata: Dict[str, Any]
+    
+    @functools.cached_property
+    def parsed(self) -> Any:
+        """Response decoded as JSON, parsed once on first access
+        
+        Raises:
+            json.JSONDecodeError: If the response is not valid JSON
+        """
+        return _loads_json(self.response_text)
+
+
+@dataclass
+class _UsageWindow:
+    """Requests and tokens sent to one model during the last minute"""
+    request_times: Deque[float] = field(default_factory=deque)
+    token_usage: Deque[Tuple[float, int]] = field(default_factory=deque)
+    token_sum: int = 0
+    
+    def trim(self, cutoff_time: float) -> None:
+        """
+        Drop entries recorded at or before cutoff_time.
+        
+        Entries are appended in time order, so expired ones are always at
+        the left end of the deques.
+        """
+        while self.request_times and self.request_times[0] <= cutoff_time:
+            self.request_times.popleft()
+        
+        while self.token_usage and self.token_usage[0][0] <= cutoff_time:
+            _, tokens = self.token_usage.popleft()
+            self.token_sum -= tokens
+
+
+class ClaudeAPIError(Exception):
+    """Raised when Claude API encounters an error"""
+    pass
+
+
+class _RequestAbandoned(Exception):
+    """Set on a shared in-flight request whose owning caller was cancelled"""
+
+
+def _stripped_length(value: str) -> int:
+    """Length of value without surrounding whitespace, copying only if there is any"""
+    if value and (value[0].isspace() or value[-1].isspace()):
+        return len(value.strip())
+    return len(value)
+
+
+def _require_text(**specs: Tuple[int, str]) -> Callable[[F], F]:
+    """
+    Validate string arguments of an async service method before it runs.
+    
+    Each keyword maps an argument name to (minimum length after stripping,
+    error message); a missing, non-string or too short value raises
+    ClaudeAPIError with that message. A list argument is checked item by
+    item.
+    """
+    def decorator(func: F) -> F:
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            arguments = signature.bind(*args, **kwargs).arguments
+            for name, (min_length, message) in specs.items():
+                value = arguments.get(name)
+                for item in value if isinstance(value, list) else (value,):
+                    if not isinstance(item, str) or _stripped_length(item) < min_length:
+                        raise ClaudeAPIError(message)
+            return await func(*args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+class ClaudeService:
+    """Service for interacting with Claude API"""
+    
+    # Model configuration
+    DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
+    MODEL_TIERS = {
+        "fast": "claude-3-5-haiku-20241022",
+        "deep": DEFAULT_MODEL
+    }
+    # Lookup-style tasks that the fast tier handles well for short inputs
+    FAST_TIER_PROMPT_TYPES = frozenset({PromptType.COMPANY_RESEARCH, PromptType.SKILLS_ANALYSIS})
+    FAST_TIER_MAX_PROMPT_LENGTH = 4000
+    MAX_TOKENS = 4000
+    TEMPERATURE = 0.7
+    
+    # Abort a streamed response after this many seconds without data
+    STREAM_STALL_TIMEOUT = 30
+    # stream_analysis coalesces deltas up to this size (chars) or age (seconds)
+    STREAM_YIELD_MIN_CHARS = 256
+    STREAM_YIELD_MAX_DELAY = 0.02
+    
+    # HTTP connection pool and timeouts (seconds); HTTP/2 lets concurrent
+    # streams share one connection
+    MAX_CONNECTIONS = 64
+    MAX_KEEPALIVE_CONNECTIONS = 32
+    KEEPALIVE_EXPIRY = 300
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 600
+    WRITE_TIMEOUT = 30
+    POOL_TIMEOUT = 5
+    
+    # Retries for connection errors and transient HTTP statuses; the SDK's
+    # own retries are disabled so every attempt passes the rate limiter
+    MAX_ATTEMPTS = 3
+    MAX_RETRY_DELAY = 30
+    RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+    
+    # Seconds between status checks while a message batch is processing
+    BATCH_POLL_INTERVAL = 30
+    
+    # Answer tokens budgeted per resume by analyze_resumes_bulk; a request
+    # carries as many resumes as fit in MAX_TOKENS
+    BULK_TOKENS_PER_RESUME = 2000
+    
+    # Completed results kept for repeated prompts; cover letters are
+    # excluded so a regenerate request gets a fresh draft
+    RESULT_CACHE_SIZE = 256
+    UNCACHED_PROMPT_TYPES = frozenset({PromptType.COVER_LETTER})
+    
+    # Rate limiting, applied separately to each model as the API does;
+    # MODEL_RATE_LIMITS overrides (requests, tokens) per minute by model
+    REQUESTS_PER_MINUTE = 50
+    TOKENS_PER_MINUTE = 40000
+    MODEL_RATE_LIMITS: Mapping[str, Tuple[int, int]] = MappingProxyType({})
+    # Rough prompt size used to reserve tokens before a request is sent
+    CHARS_PER_TOKEN = 4
+    
+    def __init__(self):
+        """Initialize Claude service"""
+        self.config = get_config()
+        
+        # Initialize client; every request goes through the async API, and
+        # the pooled HTTP client keeps connections alive between calls
+        try:
+            self.async_client = AsyncAnthropic(
+                api_key=self.config.claude.api_key,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=self.MAX_CONNECTIONS,
+                        max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=self.KEEPALIVE_EXPIRY
+                    ),
+                    timeout=httpx.Timeout(
+                        connect=self.CONNECT_TIMEOUT,
+                        read=self.READ_TIMEOUT,
+                        write=self.WRITE_TIMEOUT,
+                        pool=self.POOL_TIMEOUT
+                    )
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Claude client: {e}")
+            raise ClaudeAPIError(f"Claude API initialization failed: {e}")
+        
+        # Rate limiting tracking
+        # Rate limit windows keyed by model
+        self._usage_windows: Dict[str, _UsageWindow] = {}
+        self._rate_limit_lock = asyncio.Lock()
+        
+        # Recent results keyed by _result_cache_key
+        self._result_cache: OrderedDict[str, AnalysisResult] = OrderedDict()
+        # Requests in progress, keyed like the result cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Shared, read-only prompt templates
+        self.prompts = _PROMPT_TEMPLATES
     
-    def _check_rate_limits(self) -> None:
-        """Check and enforce rate limits"""
-        current_time = time.time()
-        
-        # Clean old entries (older than 1 minute)
-        cutoff_time = current_time - 60
-        old_request_count = len(self._request_times)
-        old_token_entries = len(self._token_usage)
-        
-        self._request_times = [t for t in self._request_times if t > cutoff_time]
-        self._token_usage = [(t, tokens) for t, tokens in self._token_usage if t > cutoff_time]
-        
-        cleaned_requests = old_request_count - len(self._request_times)
-        cleaned_tokens = old_token_entries - len(self._token_usage)
-        
-        if cleaned_requests > 0 or cleaned_tokens > 0:
-            print(f"🧹 [CLAUDE API] Cleaned old rate limit entries: {cleaned_requests} requests, {cleaned_tokens} token entries")
-        
-        # Check request rate limit
-        current_requests = len(self._request_times)
-        print(f"📈 [CLAUDE API] Current rate limits: {current_requests}/{self.REQUESTS_PER_MINUTE} requests per minute")
-        
-        if current_requests >= self.REQUESTS_PER_MINUTE:
-            sleep_time = 60 - (current_time - self._request_times[0])
-            if sleep_time > 0:
-                print(f"⏳ [CLAUDE API] REQUEST RATE LIMIT: Sleeping for {sleep_time:.1f} seconds...")
-                logger.warning(f"Rate limit reached, sleeping for {sleep_time:.1f} seconds")
-                time.sleep(sleep_time)
-                print(f"✅ [CLAUDE API] Rate limit wait completed")
-        
-        # Check token rate limit
-        total_tokens = sum(tokens for _, tokens in self._token_usage)
-        print(f"📈 [CLAUDE API] Current token usage: {total_tokens}/{self.TOKENS_PER_MINUTE} tokens per minute")
-        
-        if total_tokens >= self.TOKENS_PER_MINUTE:
-            oldest_time = self._token_usage[0][0] if self._token_usage else current_time
-            sleep_time = 60 - (current_time - oldest_time)
-            if sleep_time > 0:
-                print(f"⏳ [CLAUDE API] TOKEN RATE LIMIT: Sleeping for {sleep_time:.1f} seconds...")
-                logger.warning(f"Token rate limit reached, sleeping for {sleep_time:.1f} seconds")
-                time.sleep(sleep_time)
-                print(f"✅ [CLAUDE API] Token rate limit wait completed")
-    
-    def _record_usage(self, tokens_used: int) -> None:
-        """Record API usage for rate limiting"""
-        current_time = time.time()
-        self._request_times.append(current_time)
-        self._token_usage.append((current_time, tokens_used))
+    def _select_model(self, prompt_type: PromptType, prompt_len: int) -> str:
+        """
+        Pick the model for a request.
+        
+        Short company research and skills gap requests are routed to the fast
+        tier; everything else uses the deep tier.
+        
+        Args:
+            prompt_type: Type of analysis being performed
+            prompt_len: Length of the formatted prompt in characters
+            
+        Returns:
+            Model identifier to send to the API
+        """
+        if prompt_type in self.FAST_TIER_PROMPT_TYPES and prompt_len < self.FAST_TIER_MAX_PROMPT_LENGTH:
+            return self.MODEL_TIERS["fast"]
+        return self.MODEL_TIERS["deep"]
+    
+    def _usage_window(self, model: Optional[str] = None) -> _UsageWindow:
+        """Get the rate limit window of a model, DEFAULT_MODEL if not given"""
+        model = model or self.DEFAULT_MODEL
+        window = self._usage_windows.get(model)
+        if window is None:
+            window = self._usage_windows[model] = _UsageWindow()
+        return window
+    
+    def _rate_limits(self, model: str) -> Tuple[int, int]:
+        """Get the (requests, tokens) per minute allowed for a model"""
+        return self.MODEL_RATE_LIMITS.get(model, (self.REQUESTS_PER_MINUTE, self.TOKENS_PER_MINUTE))
+    
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Estimate the input tokens of a prompt from its length"""
+        return -(-len(prompt) // self.CHARS_PER_TOKEN)
     
+    async def _check_rate_limits(self, tokens_required: int = 0, model: Optional[str] = None) -> None:
+        """
+        Check and enforce rate limits, then reserve room for the request.
+        
+        Waits without blocking the event loop until both the request and
+        token windows of the model have room; traffic to other models is
+        not held up. The lock only covers the window check, so
+        other requests keep running while this one sleeps. Once there is
+        room, the request and its estimated tokens are recorded straight
+        away so concurrent requests see them; reconcile with _record_tokens
+        when the actual usage is known.
+        
+        Args:
+            tokens_required: Estimated input tokens of the request
+            model: Model the request is sent to, DEFAULT_MODEL if not given
+        """
+        model = model or self.DEFAULT_MODEL
+        window = self._usage_window(model)
+        requests_limit, tokens_limit = self._rate_limits(model)
+        
+        while True:
+            async with self._rate_limit_lock:
+                current_time = time.monotonic()
+                
+                # Clean old entries (older than 1 minute)
+                window.trim(current_time - 60)
+                
+                sleep_time = 0.0
+                
+                # Check request rate limit
+                current_requests = len(window.request_times)
+                
+                if current_requests >= requests_limit:
+                    sleep_time = 60 - (current_time - window.request_times[0])
+                    if sleep_time > 0:
+                        logger.warning(f"Rate limit reached, sleeping for {sleep_time:.1f} seconds")
+                
+                # Check token rate limit; a request larger than the whole
+                # budget goes through once the window is empty
+                total_tokens = window.token_sum + tokens_required
+                
+                if sleep_time <= 0 and window.token_usage and total_tokens >= tokens_limit:
+                    sleep_time = 60 - (current_time - window.token_usage[0][0])
+                    if sleep_time > 0:
+                        logger.warning(f"Token rate limit reached, sleeping for {sleep_time:.1f} seconds")
+                
+                if sleep_time <= 0:
+                    self._record_usage(tokens_required, now=current_time, model=model)
+                    return
+            
+            await asyncio.sleep(sleep_time)
+    
+    def _record_usage(self, tokens_used: int, now: Optional[float] = None, model: Optional[str] = None) -> None:
+        """
+        Record API usage for rate limiting.
+        
+        Args:
+            tokens_used: Input plus output tokens of the request
+            now: time.monotonic() reading for the request, if already taken
+            model: Model the request was sent to, DEFAULT_MODEL if not given
+        """
+        current_time = time.monotonic() if now is None else now
+        self._usage_window(model).request_times.append(current_time)
+        self._record_tokens(tokens_used, now=current_time, model=model)
+    
+    def _record_tokens(self, tokens: int, now: Optional[float] = None, model: Optional[str] = None) -> None:
+        """
+        Add tokens to the window without counting another request.
+        
+        Used to reconcile a reservation made by _check_rate_limits with the
+        actual usage; tokens is negative when the estimate was too high.
+        """
+        current_time = time.monotonic() if now is None else now
+        window = self._usage_window(model)
+        window.token_usage.append((current_time, tokens))
+        window.token_sum += tokens
+    
+    @_require_text(job_description=(50, "Job description must be at least 50 characters long"))
     async def analyze_job_description(
         self,
         job_description: str,
@@ -370,30 +666,19 @@ Format as a JSON object with specific, actionable recommendations.
         Returns:
             AnalysisResult with structured job analysis
         """
-        print(f"\n🔍 [CLAUDE API] ==================== JOB DESCRIPTION ANALYSIS ====================")
-        print(f"📝 [CLAUDE API] Input length: {len(job_description)} characters")
-        print(f"💡 [CLAUDE API] Additional context: {'Yes' if additional_context else 'None'}")
-        
-        if not job_description or len(job_description.strip()) < 50:
-            print(f"❌ [CLAUDE API] ERROR: Job description too short ({len(job_description.strip())} chars, minimum 50)")
-            raise ClaudeAPIError("Job description must be at least 50 characters long")
-        
-        print(f"📋 [CLAUDE API] Preparing job analysis prompt...")
-        print(f"🎯 [CLAUDE API] Using model: {self.DEFAULT_MODEL}")
-        print(f"🔧 [CLAUDE API] Max tokens: {self.MAX_TOKENS}, Temperature: {self.TEMPERATURE}")
-        
-        prompt = self.prompts[PromptType.JOB_ANALYSIS].format(
+        prompt = _PROMPT_RENDERERS[PromptType.JOB_ANALYSIS](
             job_description=job_description
         )
-        
-        print(f"📤 [CLAUDE API] Sending request to Claude API...")
+        model = self._select_model(PromptType.JOB_ANALYSIS, len(prompt))
         
         return await self._make_api_call(
             prompt=prompt,
             prompt_type=PromptType.JOB_ANALYSIS,
+            model=model,
             context={"job_description_length": len(job_description)}
         )
     
+    @_require_text(company_name=(2, "Company name is required"))
     async def research_company(
         self,
         company_name: str,
@@ -409,31 +694,23 @@ Format as a JSON object with specific, actionable recommendations.
         Returns:
             AnalysisResult with company research
         """
-        print(f"\n🏢 [CLAUDE API] ==================== COMPANY RESEARCH ====================")
-        print(f"🏆 [CLAUDE API] Company name: '{company_name}'")
-        print(f"📚 [CLAUDE API] Additional context: {'Yes' if context else 'None'}")
-        
-        if not company_name or len(company_name.strip()) < 2:
-            print(f"❌ [CLAUDE API] ERROR: Company name too short ('{company_name}', minimum 2 characters)")
-            raise ClaudeAPIError("Company name is required")
-        
-        print(f"📋 [CLAUDE API] Preparing company research prompt...")
-        print(f"🎯 [CLAUDE API] Using model: {self.DEFAULT_MODEL}")
-        print(f"🔧 [CLAUDE API] Max tokens: {self.MAX_TOKENS}, Temperature: {self.TEMPERATURE}")
-        
-        prompt = self.prompts[PromptType.COMPANY_RESEARCH].format(
+        prompt = _PROMPT_RENDERERS[PromptType.COMPANY_RESEARCH](
             company_name=company_name,
-            context=context or "No additional context provided"
+            context=context or _NO_CONTEXT_STR
         )
-        
-        print(f"📤 [CLAUDE API] Sending company research request to Claude API...")
+        model = self._select_model(PromptType.COMPANY_RESEARCH, len(prompt))
         
         return await self._make_api_call(
             prompt=prompt,
             prompt_type=PromptType.COMPANY_RESEARCH,
+            model=model,
             context={"company_name": company_name}
         )
     
+    @_require_text(
+        resume_content=(100, "Resume content must be at least 100 characters long"),
+        job_requirements=(1, "Job requirements are required")
+    )
     async def analyze_resume(
         self,
         resume_content: str,
@@ -449,38 +726,118 @@ Format as a JSON object with specific, actionable recommendations.
         Returns:
             AnalysisResult with resume analysis
         """
-        print(f"\n📄 [CLAUDE API] ==================== RESUME ANALYSIS ====================")
-        print(f"📝 [CLAUDE API] Resume content length: {len(resume_content)} characters")
-        print(f"📋 [CLAUDE API] Job requirements length: {len(job_requirements)} characters")
-        
-        if not resume_content or len(resume_content.strip()) < 100:
-            print(f"❌ [CLAUDE API] ERROR: Resume content too short ({len(resume_content.strip())} chars, minimum 100)")
-            raise ClaudeAPIError("Resume content must be at least 100 characters long")
-        
-        if not job_requirements:
-            print(f"❌ [CLAUDE API] ERROR: Job requirements are missing")
-            raise ClaudeAPIError("Job requirements are required")
-        
-        print(f"📋 [CLAUDE API] Preparing resume analysis prompt...")
-        print(f"🎯 [CLAUDE API] Using model: {self.DEFAULT_MODEL}")
-        print(f"🔧 [CLAUDE API] Max tokens: {self.MAX_TOKENS}, Temperature: {self.TEMPERATURE}")
-        
-        prompt = self.prompts[PromptType.RESUME_ANALYSIS].format(
+        prompt = _PROMPT_RENDERERS[PromptType.RESUME_ANALYSIS](
             resume_content=resume_content,
             job_requirements=job_requirements
         )
-        
-        print(f"📤 [CLAUDE API] Sending resume analysis request to Claude API...")
+        model = self._select_model(PromptType.RESUME_ANALYSIS, len(prompt))
         
         return await self._make_api_call(
             prompt=prompt,
             prompt_type=PromptType.RESUME_ANALYSIS,
+            model=model,
             context={
                 "resume_length": len(resume_content),
                 "requirements_length": len(job_requirements)
             }
         )
     
+    @_require_text(
+        resumes=(100, "Resume content must be at least 100 characters long"),
+        job_requirements=(1, "Job requirements are required")
+    )
+    async def analyze_resumes_bulk(
+        self,
+        resumes: List[str],
+        job_requirements: str
+    ) -> List[AnalysisResult]:
+        """
+        Analyze several resumes against the same job requirements.
+        
+        Resumes are sent MAX_TOKENS // BULK_TOKENS_PER_RESUME at a time in
+        one prompt, so the instructions and job requirements are paid for once
+        per group instead of once per resume. Groups run concurrently.
+        
+        Args:
+            resumes: Extracted resume texts
+            job_requirements: Job requirements from job analysis
+            
+        Returns:
+            One AnalysisResult per resume, in input order; usage tokens are
+            split evenly across the resumes of a request
+            
+        Raises:
+            ClaudeAPIError: If an input is invalid or a response cannot be parsed
+        """
+        size = max(1, self.MAX_TOKENS // self.BULK_TOKENS_PER_RESUME)
+        groups = await asyncio.gather(*(
+            self._analyze_resume_group(resumes[start:start + size], job_requirements)
+            for start in range(0, len(resumes), size)
+        ))
+        return [result for group in groups for result in group]
+    
+    async def _analyze_resume_group(self, resumes: List[str], job_requirements: str) -> List[AnalysisResult]:
+        """Analyze one group of resumes in a single request"""
+        if len(resumes) == 1:
+            return [await self.analyze_resume(resumes[0], job_requirements)]
+        
+        prompt = _BULK_RESUME_RENDERER(
+            count=len(resumes),
+            job_requirements=job_requirements,
+            resumes="\n".join(
+                f'<resume index="{index}">\n{resume}\n</resume>' for index, resume in enumerate(resumes)
+            )
+        )
+        result = await self._make_api_call(
+            prompt=prompt,
+            prompt_type=PromptType.RESUME_ANALYSIS,
+            context={"bulk_size": len(resumes), "requirements_length": len(job_requirements)}
+        )
+        
+        analyses = self._parse_json_array(result.response_text)
+        if len(analyses) != len(resumes):
+            raise ClaudeAPIError(f"Expected {len(resumes)} resume analyses, got {len(analyses)}")
+        by_index: Dict[int, Any] = {}
+        for analysis in analyses:
+            index = analysis.get("index") if isinstance(analysis, dict) else None
+            if type(index) is not int or not 0 <= index < len(resumes) or index in by_index:
+                raise ClaudeAPIError(
+                    f"Invalid bulk analysis response: expected indices 0 to {len(resumes) - 1}, each once"
+                )
+            by_index[index] = analysis
+        analyses = [by_index[index] for index in range(len(resumes))]
+        
+        tokens_each = result.usage_tokens // len(resumes)
+        return [
+            AnalysisResult(
+                prompt_type=PromptType.RESUME_ANALYSIS,
+                response_text=json.dumps(analysis),
+                usage_tokens=tokens_each,
+                processing_time=result.processing_time,
+                metadata={
+                    **result.metadata,
+                    "context": {
+                        "resume_length": len(resume),
+                        "requirements_length": len(job_requirements),
+                        "bulk_index": index,
+                        "bulk_size": len(resumes)
+                    }
+                }
+            )
+            for index, (resume, analysis) in enumerate(zip(resumes, analyses))
+        ]
+    
+    @staticmethod
+    def _parse_json_array(text: str) -> List[Any]:
+        """Parse a JSON array response, tolerating a surrounding code fence"""
+        try:
+            parsed = _loads_json(text)
+        except json.JSONDecodeError as e:
+            raise ClaudeAPIError(f"Invalid bulk analysis response: {e}")
+        if not isinstance(parsed, list):
+            raise ClaudeAPIError("Invalid bulk analysis response: expected a JSON array")
+        return parsed
+    
     async def generate_cover_letter(
         self,
         job_description: str,
@@ -502,36 +859,24 @@ Format as a JSON object with specific, actionable recommendations.
         Returns:
             AnalysisResult with generated cover letter
         """
-        print(f"\n✉️ [CLAUDE API] ==================== COVER LETTER GENERATION ====================")
-        print(f"📝 [CLAUDE API] Job description length: {len(job_description)} characters")
-        print(f"🏢 [CLAUDE API] Company info length: {len(company_info)} characters")
-        print(f"📄 [CLAUDE API] Resume summary length: {len(resume_summary)} characters")
-        print(f"🎨 [CLAUDE API] Tone: {tone}")
+        focus_str = ", ".join(focus_areas) if focus_areas else _DEFAULT_FOCUS_STR
         
-        focus_list = focus_areas or ["relevant experience", "technical skills"]
-        focus_str = ", ".join(focus_list)
-        print(f"🎯 [CLAUDE API] Focus areas: {focus_str}")
-        
-        print(f"📋 [CLAUDE API] Preparing cover letter generation prompt...")
-        print(f"🎯 [CLAUDE API] Using model: {self.DEFAULT_MODEL}")
-        print(f"🔧 [CLAUDE API] Max tokens: {self.MAX_TOKENS}, Temperature: {self.TEMPERATURE}")
-        
-        prompt = self.prompts[PromptType.COVER_LETTER].format(
+        prompt = _PROMPT_RENDERERS[PromptType.COVER_LETTER](
             job_description=job_description,
             company_info=company_info,
             resume_summary=resume_summary,
             tone=tone,
             focus_areas=focus_str
         )
-        
-        print(f"📤 [CLAUDE API] Sending cover letter generation request to Claude API...")
+        model = self._select_model(PromptType.COVER_LETTER, len(prompt))
         
         return await self._make_api_call(
             prompt=prompt,
             prompt_type=PromptType.COVER_LETTER,
+            model=model,
             context={
                 "tone": tone,
-                "focus_areas": focus_list
+                "focus_areas": focus_areas or list(_DEFAULT_FOCUS_AREAS)
             }
         )
     
@@ -552,151 +897,365 @@ Format as a JSON object with specific, actionable recommendations.
         Returns:
             AnalysisResult with skills analysis
         """
-        print(f"\n🎯 [CLAUDE API] ==================== SKILLS GAP ANALYSIS ====================")
-        print(f"🛠️ [CLAUDE API] Current skills count: {len(current_skills)}")
-        print(f"📋 [CLAUDE API] Job requirements length: {len(job_requirements)} characters")
-        print(f"🏭 [CLAUDE API] Industry: {industry}")
+        skills_str = ", ".join(current_skills) if current_skills else _NO_SKILLS_STR
         
-        skills_str = ", ".join(current_skills) if current_skills else "No skills specified"
-        if current_skills:
-            print(f"🔧 [CLAUDE API] Skills preview: {skills_str[:100]}{'...' if len(skills_str) > 100 else ''}")
-        else:
-            print(f"⚠️ [CLAUDE API] WARNING: No current skills provided")
-        
-        print(f"📋 [CLAUDE API] Preparing skills gap analysis prompt...")
-        print(f"🎯 [CLAUDE API] Using model: {self.DEFAULT_MODEL}")
-        print(f"🔧 [CLAUDE API] Max tokens: {self.MAX_TOKENS}, Temperature: {self.TEMPERATURE}")
-        
-        prompt = self.prompts[PromptType.SKILLS_ANALYSIS].format(
+        prompt = _PROMPT_RENDERERS[PromptType.SKILLS_ANALYSIS](
             current_skills=skills_str,
             job_requirements=job_requirements,
             industry=industry
         )
-        
-        print(f"📤 [CLAUDE API] Sending skills gap analysis request to Claude API...")
+        model = self._select_model(PromptType.SKILLS_ANALYSIS, len(prompt))
         
         return await self._make_api_call(
             prompt=prompt,
             prompt_type=PromptType.SKILLS_ANALYSIS,
+            model=model,
             context={
                 "skills_count": len(current_skills),
                 "industry": industry
             }
         )
     
+    async def analyze_application(
+        self,
+        job_description: str,
+        company_name: str,
+        resume_content: str,
+        tone: str = "professional",
+        focus_areas: Optional[List[str]] = None
+    ) -> Dict[str, AnalysisResult]:
+        """
+        Run the full analysis for one job application.
+        
+        The job, company and resume analyses do not depend on each other and
+        run concurrently; the cover letter is generated from their results.
+        
+        Args:
+            job_description: The job posting text
+            company_name: Name of the company
+            resume_content: Resume text
+            tone: Cover letter tone
+            focus_areas: Areas for the cover letter to emphasize
+            
+        Returns:
+            Results keyed by job_analysis, company_research, resume_analysis
+            and cover_letter
+        """
+        job_analysis, company_research, resume_analysis = await asyncio.gather(
+            self.analyze_job_description(job_description),
+            self.research_company(company_name),
+            self.analyze_resume(resume_content, job_description)
+        )
+        
+        cover_letter = await self.generate_cover_letter(
+            job_description=job_description,
+            company_info=company_research.response_text,
+            resume_summary=resume_analysis.response_text,
+            tone=tone,
+            focus_areas=focus_areas
+        )
+        
+        return {
+            "job_analysis": job_analysis,
+            "company_research": company_research,
+            "resume_analysis": resume_analysis,
+            "cover_letter": cover_letter
+        }
+    
+    @staticmethod
+    def _result_cache_key(prompt: str, prompt_type: PromptType, model: str) -> str:
+        """Build the result cache key for a prompt sent to a model"""
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{prompt_type.value}:{model}:{digest}"
+    
     async def _make_api_call(
         self,
         prompt: str,
         prompt_type: PromptType,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
     ) -> AnalysisResult:
         """
         Make API call to Claude with error handling and rate limiting.
         
+        The response is streamed so a stalled connection is detected after
+        STREAM_STALL_TIMEOUT seconds instead of hanging until the client
+        timeout. Connection errors and transient HTTP statuses are retried up
+        to MAX_ATTEMPTS times in total.
+        
+        Identical prompts for cacheable prompt types are answered from the
+        in-process result cache without an API call, and concurrent identical
+        requests share a single in-flight call.
+        
         Args:
             prompt: The prompt to send
             prompt_type: Type of analysis being performed
             context: Additional context for the request
+            model: Model to use; selected from the prompt when omitted
             
         Returns:
             AnalysisResult with API response
         """
-        print(f"\n🚀 [CLAUDE API] ==================== API CALL EXECUTION ====================")
-        print(f"💬 [CLAUDE API] Prompt type: {prompt_type.value}")
-        print(f"📝 [CLAUDE API] Prompt length: {len(prompt)} characters")
-        print(f"📈 [CLAUDE API] Context data: {list(context.keys()) if context else 'None'}")
+        if model is None:
+            model = self._select_model(prompt_type, len(prompt))
+        
+        cache_key = None
+        if prompt_type not in self.UNCACHED_PROMPT_TYPES:
+            cache_key = self._result_cache_key(prompt, prompt_type, model)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                self._result_cache.move_to_end(cache_key)
+                logger.debug("Claude result cache hit: type=%s", prompt_type.value)
+                return replace(
+                    cached,
+                    processing_time=0.0,
+                    metadata={**cached.metadata, "context": context or {}, "cached": True}
+                )
         
+        if cache_key is None:
+            return await self._send_request(prompt, prompt_type, model, context, cache_key)
+        
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            logger.debug("Claude request coalesced: type=%s", prompt_type.value)
+            try:
+                result = await asyncio.shield(inflight)
+            except _RequestAbandoned:
+                # The caller that sent the request was cancelled; this one
+                # wasn't, so send the request again
+                return await self._make_api_call(prompt, prompt_type, context, model)
+            return replace(result, metadata={**result.metadata, "context": context or {}, "coalesced": True})
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await self._send_request(prompt, prompt_type, model, context, cache_key)
+        except asyncio.CancelledError:
+            # Waiting callers were not cancelled; let them retry on their own
+            future.set_exception(_RequestAbandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(cache_key, None)
+    
+    async def _send_request(
+        self,
+        prompt: str,
+        prompt_type: PromptType,
+        model: str,
+        context: Optional[Dict[str, Any]],
+        cache_key: Optional[str]
+    ) -> AnalysisResult:
+        """
+        Send one request through the rate limiter, with retries.
+        
+        Successful results are stored in the result cache under cache_key
+        when one is given.
+        """
         # Check rate limits
-        print(f"🕒 [CLAUDE API] Checking rate limits...")
-        self._check_rate_limits()
-        print(f"✅ [CLAUDE API] Rate limits OK - proceeding with request")
+        estimated_tokens = self._estimate_tokens(prompt)
+        await self._check_rate_limits(estimated_tokens, model=model)
         
-        start_time = time.time()
-        print(f"⏱️ [CLAUDE API] Request started at: {time.strftime('%H:%M:%S', time.localtime(start_time))}")
+        logger.debug(
+            "Claude call: type=%s model=%s prompt_len=%d",
+            prompt_type.value, model, len(prompt)
+        )
+        start_time = time.monotonic()
         
         try:
-            # Prepare messages
-            print(f"📦 [CLAUDE API] Preparing message payload...")
-            messages: List[MessageParam] = [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-            print(f"✅ [CLAUDE API] Message payload prepared successfully")
-            
-            # Make API call
-            print(f"🌐 [CLAUDE API] Sending request to Anthropic API...")
-            print(f"🤖 [CLAUDE API] Model: {self.DEFAULT_MODEL}")
-            print(f"🔢 [CLAUDE API] Max tokens: {self.MAX_TOKENS}")
-            print(f"🌡️ [CLAUDE API] Temperature: {self.TEMPERATURE}")
-            
-            response = await self.async_client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=self.MAX_TOKENS,
-                temperature=self.TEMPERATURE,
-                messages=messages
-            )
+            for attempt in range(self.MAX_ATTEMPTS):
+                try:
+                    response_text, response = await self._stream_message(prompt, model)
+                    break
+                except (anthropic.APIConnectionError, anthropic.APIStatusError) as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    logger.warning(
+                        "Claude API request failed (%s), retrying in %.1f seconds",
+                        type(e).__name__, delay
+                    )
+                    await asyncio.sleep(delay)
+                    # Every attempt uses a request slot
+                    await self._check_rate_limits(model=model)
             
             # Calculate processing time
-            processing_time = time.time() - start_time
-            print(f"✅ [CLAUDE API] API response received successfully!")
-            print(f"⏱️ [CLAUDE API] Processing time: {processing_time:.2f} seconds")
-            
-            # Extract response text
-            print(f"🔄 [CLAUDE API] Extracting response content...")
-            response_text = ""
-            if response.content:
-                for block in response.content:
-                    if hasattr(block, 'text'):
-                        response_text += block.text
-            
-            print(f"📝 [CLAUDE API] Response length: {len(response_text)} characters")
+            finished = time.monotonic()
+            processing_time = finished - start_time
             
             # Record usage
             tokens_used = response.usage.input_tokens + response.usage.output_tokens
-            print(f"📊 [CLAUDE API] Token usage:")
-            print(f"    • Input tokens: {response.usage.input_tokens}")
-            print(f"    • Output tokens: {response.usage.output_tokens}")
-            print(f"    • Total tokens: {tokens_used}")
-            
-            self._record_usage(tokens_used)
-            print(f"📈 [CLAUDE API] Usage recorded for rate limiting")
+            self._record_tokens(tokens_used - estimated_tokens, now=finished, model=model)
             
-            logger.info(f"Claude API call successful: {prompt_type.value}, {tokens_used} tokens, {processing_time:.2f}s")
-            print(f"✅ [CLAUDE API] ==================== API CALL COMPLETED SUCCESSFULLY ====================")
+            logger.info(
+                "Claude API call successful: %s, %d tokens, %.2fs",
+                prompt_type.value, tokens_used, processing_time
+            )
             
-            return AnalysisResult(
+            result = AnalysisResult(
                 prompt_type=prompt_type,
                 response_text=response_text,
                 usage_tokens=tokens_used,
                 processing_time=processing_time,
                 metadata={
-                    "model": self.DEFAULT_MODEL,
+                    "model": model,
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens,
                     "context": context or {}
                 }
             )
             
-        except anthropic.APIError as e:
-            error_msg = f"API request failed: {e}"
-            print(f"❌ [CLAUDE API] ERROR: Anthropic API error - {e}")
-            logger.error(f"Claude API error: {e}")
-            raise ClaudeAPIError(error_msg)
+            if cache_key is not None:
+                self._result_cache[cache_key] = result
+                if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+            
+            return result
+            
+        except ClaudeAPIError:
+            raise
         except anthropic.RateLimitError as e:
+            # Subclass of APIStatusError/APIError, so it must be handled first
             error_msg = f"Rate limit exceeded: {e}"
-            print(f"❌ [CLAUDE API] ERROR: Rate limit exceeded - {e}")
-            print(f"⏳ [CLAUDE API] You may need to wait before making more requests")
+            retry_after = e.response.headers.get("retry-after")
+            if retry_after:
+                error_msg += f" (retry after {retry_after} seconds)"
             logger.error(f"Claude API rate limit exceeded: {e}")
             raise ClaudeAPIError(error_msg)
+        except anthropic.APIStatusError as e:
+            error_msg = f"API request failed with status {e.status_code}: {e}"
+            logger.error(f"Claude API error: {e}")
+            raise ClaudeAPIError(error_msg)
+        except anthropic.APIConnectionError as e:
+            error_msg = f"API connection failed: {e}"
+            logger.error(f"Claude API connection error: {e}")
+            raise ClaudeAPIError(error_msg)
+        except anthropic.APIError as e:
+            error_msg = f"API request failed: {e}"
+            logger.error(f"Claude API error: {e}")
+            raise ClaudeAPIError(error_msg)
         except Exception as e:
             error_msg = f"Unexpected error: {e}"
-            print(f"❌ [CLAUDE API] ERROR: Unexpected error - {e}")
-            print(f"🔍 [CLAUDE API] Error type: {type(e).__name__}")
             logger.error(f"Unexpected error in Claude API call: {e}")
             raise ClaudeAPIError(error_msg)
     
+    def _retry_delay(self, error: anthropic.APIError, attempt: int) -> Optional[float]:
+        """
+        Work out how long to wait before retrying a failed request.
+        
+        Connection errors and transient HTTP statuses are retried with
+        exponential backoff plus jitter, waiting at least as long as the
+        server's retry-after header asks.
+        
+        Args:
+            error: Error raised by the attempt
+            attempt: Zero-based number of the failed attempt
+            
+        Returns:
+            Seconds to wait, or None if the error should not be retried
+        """
+        if attempt + 1 >= self.MAX_ATTEMPTS:
+            return None
+        
+        delay = min(2 ** attempt + random.random(), self.MAX_RETRY_DELAY)
+        if isinstance(error, anthropic.APIStatusError):
+            if error.status_code not in self.RETRYABLE_STATUS_CODES:
+                return None
+            try:
+                retry_after = float(error.response.headers.get("retry-after", 0))
+            except ValueError:
+                retry_after = 0.0
+            if retry_after > self.MAX_RETRY_DELAY:
+                return None
+            delay = max(delay, retry_after)
+        
+        return delay
+    
+    async def _stream_message(self, prompt: str, model: str) -> Tuple[str, Message]:
+        """
+        Stream one response to completion.
+        
+        Returns:
+            Response text and the final message
+        """
+        chunks: List[str] = []
+        async with self._open_stream(prompt, model) as stream:
+            async for text in self._iter_stream_text(stream):
+                chunks.append(text)
+            response = await self._await_stream(stream.get_final_message())
+        return "".join(chunks), response
+    
+    async def _await_stream(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await one step of a streamed response under the stall timeout.
+        
+        Raises:
+            ClaudeAPIError: If the step takes longer than STREAM_STALL_TIMEOUT seconds
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.STREAM_STALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Claude stream stalled for {self.STREAM_STALL_TIMEOUT} seconds")
+            raise ClaudeAPIError(f"Stream stalled: no data received for {self.STREAM_STALL_TIMEOUT} seconds")
+    
+    @asynccontextmanager
+    async def _open_stream(self, prompt: str, model: str) -> AsyncIterator[AsyncMessageStream]:
+        """
+        Open a streamed Claude request for a prompt.
+        
+        Waiting for the response headers is covered by the stall timeout, so
+        a server that never answers fails fast instead of hanging.
+        
+        Args:
+            prompt: The prompt to send
+            model: Model to use
+            
+        Yields:
+            The open message stream
+        """
+        messages: List[MessageParam] = [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        manager = self.async_client.messages.stream(
+            model=model,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            messages=messages
+        )
+        stream = await self._await_stream(manager.__aenter__())
+        async with AsyncExitStack() as stack:
+            stack.push_async_exit(manager)
+            yield stream
+    
+    async def _iter_stream_text(self, stream: AsyncMessageStream) -> AsyncGenerator[str, None]:
+        """
+        Iterate the text deltas of a message stream under the stall timeout.
+        
+        Args:
+            stream: An open message stream
+            
+        Yields:
+            Chunks of response text
+        """
+        text_stream = stream.text_stream.__aiter__()
+        while True:
+            try:
+                text = await self._await_stream(text_stream.__anext__())
+            except StopAsyncIteration:
+                return
+            yield text
+    
     async def stream_analysis(
         self,
         prompt: str,
@@ -709,69 +1268,219 @@ Format as a JSON object with specific, actionable recommendations.
             prompt: The prompt to send
             prompt_type: Type of analysis
             
+        Small deltas are coalesced: text is yielded once STREAM_YIELD_MIN_CHARS
+        have been buffered or STREAM_YIELD_MAX_DELAY seconds have passed since
+        the oldest buffered delta arrived.
+        
         Yields:
             Chunks of response text
         """
         # Check rate limits
-        self._check_rate_limits()
+        model = self._select_model(prompt_type, len(prompt))
+        estimated_tokens = self._estimate_tokens(prompt)
+        await self._check_rate_limits(estimated_tokens, model=model)
         
         try:
-            messages: List[MessageParam] = [
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ]
-            
-            # Create streaming response
-            stream = await self.async_client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=self.MAX_TOKENS,
-                temperature=self.TEMPERATURE,
-                messages=messages,
-                stream=True
-            )
+            loop = asyncio.get_running_loop()
+            buffer: List[str] = []
+            buffered_chars = 0
+            buffer_started = 0.0
             
-            total_tokens = 0
-            async for chunk in stream:
-                if chunk.type == "content_block_delta":
-                    if hasattr(chunk.delta, 'text'):
-                        yield chunk.delta.text
-                elif chunk.type == "message_delta":
-                    if chunk.usage:
-                        total_tokens += chunk.usage.output_tokens
+            async with self._open_stream(prompt, model) as stream:
+                deltas = self._iter_stream_text(stream)
+                # The next delta is awaited as a task so a pending buffer can
+                # be flushed on time even while no new text arrives
+                next_delta = asyncio.ensure_future(deltas.__anext__())
+                try:
+                    while True:
+                        timeout = None
+                        if buffer:
+                            timeout = max(0.0, buffer_started + self.STREAM_YIELD_MAX_DELAY - loop.time())
+                        done, _ = await asyncio.wait((next_delta,), timeout=timeout)
+                        if not done:
+                            yield "".join(buffer)
+                            buffer.clear()
+                            buffered_chars = 0
+                            continue
+                        try:
+                            text = next_delta.result()
+                        except StopAsyncIteration:
+                            break
+                        next_delta = asyncio.ensure_future(deltas.__anext__())
+                        
+                        if not buffer:
+                            buffer_started = loop.time()
+                        buffer.append(text)
+                        buffered_chars += len(text)
+                        if (buffered_chars >= self.STREAM_YIELD_MIN_CHARS
+                                or loop.time() - buffer_started >= self.STREAM_YIELD_MAX_DELAY):
+                            yield "".join(buffer)
+                            buffer.clear()
+                            buffered_chars = 0
+                finally:
+                    if not next_delta.done():
+                        next_delta.cancel()
+                        await asyncio.gather(next_delta, return_exceptions=True)
+                if buffer:
+                    yield "".join(buffer)
+                response = await self._await_stream(stream.get_final_message())
             
             # Record usage
-            self._record_usage(total_tokens)
+            self._record_tokens(
+                response.usage.input_tokens + response.usage.output_tokens - estimated_tokens,
+                model=model
+            )
             
+        except ClaudeAPIError:
+            raise
         except Exception as e:
             logger.error(f"Streaming error: {e}")
             raise ClaudeAPIError(f"Streaming failed: {e}")
     
+    async def batch_analyze(
+        self,
+        jobs: List[Tuple[PromptType, str, Optional[Dict[str, Any]]]]
+    ) -> List[AnalysisResult]:
+        """
+        Run formatted prompts through the Message Batches API.
+        
+        Batches are billed at a discount and do not count against the
+        per-minute limits, but results can take minutes to hours, so this is
+        meant for offline and bulk work rather than interactive requests.
+        
+        Args:
+            jobs: (prompt type, formatted prompt, context) tuples
+            
+        Returns:
+            AnalysisResults in the same order as jobs
+            
+        Raises:
+            ClaudeAPIError: If the batch cannot be run or any request in it fails
+        """
+        if not jobs:
+            return []
+        
+        models = [self._select_model(prompt_type, len(prompt)) for prompt_type, prompt, _ in jobs]
+        requests = [
+            {
+                "custom_id": f"job-{i}",
+                "params": {
+                    "model": models[i],
+                    "max_tokens": self.MAX_TOKENS,
+                    "temperature": self.TEMPERATURE,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            }
+            for i, (_, prompt, _) in enumerate(jobs)
+        ]
+        
+        start_time = time.monotonic()
+        
+        try:
+            batches = self.async_client.messages.batches
+            batch = await batches.create(requests=requests)
+            logger.info("Submitted Claude batch %s with %d requests", batch.id, len(requests))
+            
+            while batch.processing_status != "ended":
+                await asyncio.sleep(self.BATCH_POLL_INTERVAL)
+                batch = await batches.retrieve(batch.id)
+            
+            processing_time = time.monotonic() - start_time
+            results: List[Optional[AnalysisResult]] = [None] * len(jobs)
+            failed: List[str] = []
+            
+            async for entry in await batches.results(batch.id):
+                index = int(entry.custom_id.split("-", 1)[1])
+                if entry.result.type != "succeeded":
+                    failed.append(f"{entry.custom_id} ({entry.result.type})")
+                    continue
+                
+                message = entry.result.message
+                prompt_type, _, context = jobs[index]
+                results[index] = AnalysisResult(
+                    prompt_type=prompt_type,
+                    response_text="".join(block.text for block in message.content if block.type == "text"),
+                    usage_tokens=message.usage.input_tokens + message.usage.output_tokens,
+                    processing_time=processing_time,
+                    metadata={
+                        "model": models[index],
+                        "input_tokens": message.usage.input_tokens,
+                        "output_tokens": message.usage.output_tokens,
+                        "context": context or {},
+                        "batch_id": batch.id
+                    }
+                )
+        except anthropic.APIError as e:
+            logger.error(f"Claude batch error: {e}")
+            raise ClaudeAPIError(f"Batch request failed: {e}")
+        
+        if failed:
+            raise ClaudeAPIError(f"Batch {batch.id} had failed requests: {', '.join(failed)}")
+        
+        missing = [f"job-{i}" for i, result in enumerate(results) if result is None]
+        if missing:
+            raise ClaudeAPIError(f"Batch {batch.id} returned no result for: {', '.join(missing)}")
+        
+        logger.info("Claude batch %s completed: %d results, %.2fs", batch.id, len(results), processing_time)
+        return results
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client"""
+        await self.async_client.close()
+    
     def get_usage_stats(self) -> Dict[str, Any]:
-        """Get current usage statistics"""
-        current_time = time.time()
-        cutoff_time = current_time - 60
+        """
+        Get current usage statistics.
         
-        recent_requests = len([t for t in self._request_times if t > cutoff_time])
-        recent_tokens = sum(tokens for t, tokens in self._token_usage if t > cutoff_time)
+        The top-level figures are DEFAULT_MODEL's window, as before per-model
+        limits existed; every model's figures are under "models".
+        """
+        cutoff_time = time.monotonic() - 60
+        models = dict.fromkeys(self.MODEL_TIERS.values())
+        models.update(dict.fromkeys(self._usage_windows))
         
-        return {
-            "requests_last_minute": recent_requests,
-            "tokens_last_minute": recent_tokens,
-            "requests_limit": self.REQUESTS_PER_MINUTE,
-            "tokens_limit": self.TOKENS_PER_MINUTE,
-            "requests_remaining": max(0, self.REQUESTS_PER_MINUTE - recent_requests),
-            "tokens_remaining": max(0, self.TOKENS_PER_MINUTE - recent_tokens)
-        }
+        per_model: Dict[str, Dict[str, int]] = {}
+        for model in models:
+            window = self._usage_window(model)
+            window.trim(cutoff_time)
+            requests_limit, tokens_limit = self._rate_limits(model)
+            recent_requests = len(window.request_times)
+            recent_tokens = window.token_sum
+            per_model[model] = {
+                "requests_last_minute": recent_requests,
+                "tokens_last_minute": recent_tokens,
+                "requests_limit": requests_limit,
+                "tokens_limit": tokens_limit,
+                "requests_remaining": max(0, requests_limit - recent_requests),
+                "tokens_remaining": max(0, tokens_limit - recent_tokens)
+            }
+        
+        stats: Dict[str, Any] = dict(per_model[self.DEFAULT_MODEL])
+        stats["models"] = per_model
+        return stats
+
+
+_service_lock = threading.Lock()
+
 
+@functools.lru_cache(maxsize=1)
+def _create_claude_service() -> ClaudeService:
+    """Build the process-wide service; only called under _service_lock"""
+    return ClaudeService()
 
-# Global service instance
-_claude_service_instance = None
 
 def get_claude_service() -> ClaudeService:
     """Get Claude service singleton instance"""
-    global _claude_service_instance
-    if _claude_service_instance is None:
-        _claude_service_instance = ClaudeService()
-    return _claude_service_instance
\ No newline at end of file
+    # lru_cache alone may run the factory twice on a concurrent first call
+    with _service_lock:
+        return _create_claude_service()
+
+
+async def close_claude_service() -> None:
+    """Close the singleton's HTTP client if it was created; call on shutdown"""
+    with _service_lock:
+        if not _create_claude_service.cache_info().currsize:
+            return
+        service = _create_claude_service()
+        _create_claude_service.cache_clear()
+    await service.aclose()
@@ -5,14 +5,19 @@ Handles secure file uploads, validation, and text extraction for resumes.
 Supports PDF, DOCX, and TXT formats with comprehensive security checks.
 """
 
+import asyncio
+import mmap
 import os
+import re
 import tempfile
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
-from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple, Union
+from datetime import datetime, timedelta, timezone
 import secrets
 import hashlib
+from contextlib import nullcontext
+from io import BytesIO
 # Try to import magic, fallback to mimetypes if not available
 try:
     import magic
@@ -20,12 +25,18 @@ try:
 except ImportError:
     import mimetypes
     MAGIC_AVAILABLE = False
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # File processing imports
 import PyPDF2
 from docx import Document
 import chardet
+# PyMuPDF parses PDFs in C; PyPDF2 is used when it is missing or fails
+try:
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
 
 from config import get_config
 from utils.parsers import get_resume_parser
@@ -43,6 +54,8 @@ class FileInfo:
     upload_timestamp: datetime
     file_hash: str
     temp_path: Optional[Path] = None
+    # Set by FileService.extract_text so the file is only parsed once
+    extracted: Optional["ExtractedContent"] = field(default=None, repr=False)
 
 @dataclass
 class ExtractedContent:
@@ -63,6 +76,37 @@ class FileProcessingError(Exception):
     pass
 
 
+# Common section headers, in order of precedence
+_SECTION_KEYWORDS = {
+    'experience': ['experience', 'work history', 'employment', 'professional experience', 'career'],
+    'education': ['education', 'academic', 'qualification', 'degree', 'university', 'college'],
+    'skills': ['skills', 'competencies', 'technical skills', 'expertise', 'proficiencies'],
+    'summary': ['summary', 'profile', 'objective', 'about', 'overview'],
+    'contact': ['contact', 'phone', 'email', 'address', 'linkedin'],
+    'projects': ['projects', 'portfolio', 'achievements', 'accomplishments'],
+    'certifications': ['certifications', 'licenses', 'certificates']
+}
+_SECTION_PRECEDENCE = {name: index for index, name in enumerate(_SECTION_KEYWORDS)}
+
+
+def _section_header_pattern(reverse: bool = False) -> re.Pattern:
+    """
+    Build a pattern matching any section keyword at the start of a line.
+    
+    Each section is a named group, so match.lastgroup is the section name.
+    With reverse=True the keywords are reversed, so matching the reversed
+    line finds a keyword at its end.
+    """
+    return re.compile('|'.join(
+        f"(?P<{name}>{'|'.join(re.escape(keyword[::-1] if reverse else keyword) for keyword in keywords)})"
+        for name, keywords in _SECTION_KEYWORDS.items()
+    ), re.IGNORECASE)
+
+
+_SECTION_START_RE = _section_header_pattern()
+_SECTION_END_RE = _section_header_pattern(reverse=True)
+
+
 class FileService:
     """Service for handling file uploads and processing"""
     
@@ -75,10 +119,37 @@ class FileService:
         ],
         'txt': ['text/plain', 'text/x-plain', 'application/octet-stream']
     }
+    _MIME_TO_FORMAT = {
+        mime_type: fmt for fmt, mime_types in SUPPORTED_FORMATS.items() for mime_type in mime_types
+    }
+    
+    # Format-specific validator and extractor methods, looked up by name so
+    # subclasses can override them
+    _VALIDATORS = {
+        'pdf': '_validate_pdf',
+        'docx': '_validate_docx',
+        'txt': '_validate_text'
+    }
+    _EXTRACTORS = {
+        'pdf': '_extract_pdf_text',
+        'docx': '_extract_docx_text',
+        'txt': '_extract_text_content'
+    }
     
     # File size limits (configurable)
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB default
     
+    # Characters replaced with '_' in stored filenames
+    _FILENAME_TRANSLATION = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+    
+    # Uploads are hashed and written in chunks of this size
+    WRITE_CHUNK_SIZE = 1024 * 1024
+    
+    # Type and encoding detection only look at the start of the content;
+    # libmagic's DOCX rules need the first few ZIP entries
+    MAGIC_SNIFF_BYTES = 64 * 1024
+    ENCODING_SNIFF_BYTES = 64 * 1024
+    
     # Security patterns to block
     DANGEROUS_PATTERNS = [
         b'<script',
@@ -91,6 +162,15 @@ class FileService:
         b'#!/bin/',
         b'#!/usr/bin/'
     ]
+    # All patterns in one case-insensitive scan, so content.lower() is not
+    # needed; the match is reported as the lowercase pattern
+    _DANGEROUS_RE = re.compile(b'|'.join(map(re.escape, DANGEROUS_PATTERNS)), re.IGNORECASE)
+    # Format-specific threats: (pattern, error message)
+    _FORMAT_THREATS = {
+        # '/js' also covers '/javascript'
+        'pdf': (re.compile(rb'/js', re.IGNORECASE), "PDF contains JavaScript which is not allowed"),
+        'docx': (re.compile(rb'vbaProject|(?i:macros)'), "Documents with macros are not allowed")
+    }
     
     def __init__(self):
         """Initialize file service"""
@@ -136,7 +216,7 @@ class FileService:
         # Detect actual file type using magic numbers or fallback to mimetypes
         if MAGIC_AVAILABLE:
             try:
-                detected_type = magic.from_buffer(file_content, mime=True)
+                detected_type = magic.from_buffer(file_content[:self.MAGIC_SNIFF_BYTES], mime=True)
             except Exception:
                 # Fallback: use content type
                 detected_type = content_type
@@ -146,11 +226,7 @@ class FileService:
             detected_type = guessed_type or content_type
         
         # Validate file format
-        format_name = None
-        for fmt, mime_types in self.SUPPORTED_FORMATS.items():
-            if detected_type in mime_types:
-                format_name = fmt
-                break
+        format_name = self._MIME_TO_FORMAT.get(detected_type)
         
         if not format_name:
             # Special handling for text files
@@ -163,98 +239,98 @@ class FileService:
         self._security_scan(file_content, format_name)
         
         # Format-specific validation
-        if format_name == 'pdf':
-            self._validate_pdf(file_content)
-        elif format_name == 'docx':
-            self._validate_docx(file_content)
-        elif format_name == 'txt':
-            self._validate_text(file_content)
+        getattr(self, self._VALIDATORS[format_name])(file_content)
         
         return format_name
     
     def _security_scan(self, content: bytes, file_format: str) -> None:
         """Scan file content for security threats"""
         # Check for dangerous patterns
-        content_lower = content.lower()
-        for pattern in self.DANGEROUS_PATTERNS:
-            if pattern in content_lower:
-                raise FileValidationError(f"Suspicious content detected: {pattern.decode('utf-8', errors='ignore')}")
-        
-        # Additional format-specific security checks
-        if file_format == 'pdf':
-            # Check for JavaScript in PDF
-            if b'/js' in content_lower or b'/javascript' in content_lower:
-                raise FileValidationError("PDF contains JavaScript which is not allowed")
-        
-        elif file_format == 'docx':
-            # Check for macros
-            if b'vbaProject' in content or b'macros' in content_lower:
-                raise FileValidationError("Documents with macros are not allowed")
+        match = self._DANGEROUS_RE.search(content)
+        if match:
+            pattern = match.group().lower()
+            raise FileValidationError(f"Suspicious content detected: {pattern.decode('utf-8', errors='ignore')}")
+        
+        # Additional format-specific security checks (PDF JavaScript, DOCX macros)
+        threat = self._FORMAT_THREATS.get(file_format)
+        if threat and threat[0].search(content):
+            raise FileValidationError(threat[1])
     
     def _validate_pdf(self, content: bytes) -> None:
         """Validate PDF file structure"""
+        if PYMUPDF_AVAILABLE:
+            try:
+                doc = pymupdf.open(stream=content, filetype="pdf")
+            except Exception as e:
+                logger.debug(f"PyMuPDF could not open PDF, falling back to PyPDF2: {e}")
+            else:
+                with doc:
+                    self._check_pdf_document(doc)
+                return
+        
         try:
-            # Create temporary file to validate PDF
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_file.write(content)
-                temp_path = temp_file.name
+            # Parse from memory; no temporary file needed
+            reader = PyPDF2.PdfReader(BytesIO(content))
+            
+            # Check if PDF is readable
+            if len(reader.pages) == 0:
+                raise FileValidationError("PDF contains no readable pages")
             
+            # Check for excessive page count (potential DoS)
+            if len(reader.pages) > 50:
+                raise FileValidationError("PDF exceeds maximum page limit (50 pages)")
+            
+            # Try to read first page to ensure it's not corrupted
             try:
-                # Try to read PDF
-                with open(temp_path, 'rb') as pdf_file:
-                    reader = PyPDF2.PdfReader(pdf_file)
-                    
-                    # Check if PDF is readable
-                    if len(reader.pages) == 0:
-                        raise FileValidationError("PDF contains no readable pages")
-                    
-                    # Check for excessive page count (potential DoS)
-                    if len(reader.pages) > 50:
-                        raise FileValidationError("PDF exceeds maximum page limit (50 pages)")
-                    
-                    # Try to read first page to ensure it's not corrupted
-                    try:
-                        first_page = reader.pages[0]
-                        text = first_page.extract_text()
-                        # PDF should have some extractable content
-                        if not text or len(text.strip()) < 10:
-                            logger.warning("PDF appears to have minimal text content")
-                    except Exception:
-                        raise FileValidationError("PDF appears to be corrupted or unreadable")
-                        
-            finally:
-                # Cleanup temp file
-                os.unlink(temp_path)
+                first_page = reader.pages[0]
+                text = first_page.extract_text()
+                # PDF should have some extractable content
+                if not text or len(text.strip()) < 10:
+                    logger.warning("PDF appears to have minimal text content")
+            except Exception:
+                raise FileValidationError("PDF appears to be corrupted or unreadable")
                 
         except FileValidationError:
             raise
         except Exception as e:
             raise FileValidationError(f"PDF validation failed: {str(e)}")
     
+    def _check_pdf_document(self, doc: "pymupdf.Document") -> None:
+        """Apply the PDF validation rules to a document opened with PyMuPDF"""
+        # Check if PDF is readable
+        if doc.page_count == 0:
+            raise FileValidationError("PDF contains no readable pages")
+        
+        # Check for excessive page count (potential DoS)
+        if doc.page_count > 50:
+            raise FileValidationError("PDF exceeds maximum page limit (50 pages)")
+        
+        # Try to read first page to ensure it's not corrupted
+        try:
+            if doc.needs_pass:
+                raise ValueError("PDF is encrypted")
+            text = doc[0].get_text("text")
+        except Exception:
+            raise FileValidationError("PDF appears to be corrupted or unreadable")
+        
+        # PDF should have some extractable content
+        if not text or len(text.strip()) < 10:
+            logger.warning("PDF appears to have minimal text content")
+    
     def _validate_docx(self, content: bytes) -> None:
         """Validate DOCX file structure"""
         try:
-            # Create temporary file to validate DOCX
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-                temp_file.write(content)
-                temp_path = temp_file.name
+            # Parse from memory; no temporary file needed
+            doc = Document(BytesIO(content))
             
-            try:
-                # Try to read DOCX
-                doc = Document(temp_path)
-                
-                # Check if document has content
-                if len(doc.paragraphs) == 0:
-                    raise FileValidationError("Document contains no readable content")
-                
-                # Check for excessive content (potential DoS)
-                total_text = ''.join([para.text for para in doc.paragraphs])
-                if len(total_text) > 1000000:  # 1MB of text
-                    raise FileValidationError("Document content exceeds size limit")
-                    
-            finally:
-                # Cleanup temp file
-                os.unlink(temp_path)
+            # Check if document has content
+            if len(doc.paragraphs) == 0:
+                raise FileValidationError("Document contains no readable content")
+            
+            # Check for excessive content (potential DoS)
+            total_text = ''.join([para.text for para in doc.paragraphs])
+            if len(total_text) > 1000000:  # 1MB of text
+                raise FileValidationError("Document content exceeds size limit")
                 
         except FileValidationError:
             raise
@@ -264,13 +340,17 @@ class FileService:
     def _validate_text(self, content: bytes) -> None:
         """Validate text file content"""
         try:
-            # Detect encoding
-            encoding_result = chardet.detect(content)
-            if encoding_result['confidence'] < 0.7:
-                raise FileValidationError("Text file encoding could not be reliably detected")
-            
-            # Try to decode
-            text = content.decode(encoding_result['encoding'])
+            # Most uploads are UTF-8, which decodes in C and fails fast on
+            # other encodings; only detect the encoding when it does not
+            try:
+                text = content.decode('utf-8')
+            except UnicodeDecodeError:
+                encoding_result = self._detect_encoding(content)
+                if encoding_result['confidence'] < 0.7:
+                    raise FileValidationError("Text file encoding could not be reliably detected")
+                
+                # Try to decode
+                text = content.decode(encoding_result['encoding'])
             
             # Check for reasonable content
             if len(text.strip()) < 10:
@@ -287,6 +367,24 @@ class FileService:
         except Exception as e:
             raise FileValidationError(f"Text validation failed: {str(e)}")
     
+    def _detect_encoding(self, content: Union[bytes, mmap.mmap]) -> Dict[str, Any]:
+        """
+        Detect the encoding of text content with chardet.
+        
+        Only the first ENCODING_SNIFF_BYTES are examined, unless the whole
+        content does not decode with the encoding detected there (e.g. the
+        first non-ASCII character comes later).
+        """
+        if len(content) > self.ENCODING_SNIFF_BYTES:
+            encoding_result = chardet.detect(content[:self.ENCODING_SNIFF_BYTES])
+            try:
+                str(content, encoding_result['encoding'] or 'utf-8')
+                return encoding_result
+            except (UnicodeDecodeError, LookupError):
+                pass
+        # chardet only accepts bytes; bytes(content) does not copy bytes
+        return chardet.detect(bytes(content))
+    
     def save_file(self, file_content: bytes, filename: str, content_type: str) -> FileInfo:
         """
         Save uploaded file securely.
@@ -307,16 +405,24 @@ class FileService:
         safe_filename = self._sanitize_filename(filename)
         temp_path = self.temp_dir / f"{file_id}_{safe_filename}"
         
-        # Calculate file hash for integrity
-        file_hash = hashlib.sha256(file_content).hexdigest()
+        # Create the file with restrictive permissions in one step; O_EXCL
+        # refuses an existing file or symlink at the path
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+        except OSError as e:
+            raise FileProcessingError(f"Failed to save file: {str(e)}")
         
         try:
-            # Save file securely
-            with open(temp_path, 'wb') as f:
-                f.write(file_content)
-            
-            # Set restrictive permissions
-            temp_path.chmod(0o600)
+            # Save file securely, hashing each chunk for integrity as it is
+            # written so the content is walked once while it is in cache
+            hasher = hashlib.sha256()
+            content_view = memoryview(file_content)
+            with os.fdopen(fd, 'wb') as f:
+                for offset in range(0, len(content_view), self.WRITE_CHUNK_SIZE):
+                    chunk = content_view[offset:offset + self.WRITE_CHUNK_SIZE]
+                    hasher.update(chunk)
+                    f.write(chunk)
+            file_hash = hasher.hexdigest()
             
             # Create file info
             file_info = FileInfo(
@@ -339,21 +445,27 @@ class FileService:
                 temp_path.unlink()
             raise FileProcessingError(f"Failed to save file: {str(e)}")
     
+    async def save_file_async(self, file_content: bytes, filename: str, content_type: str) -> FileInfo:
+        """
+        Validate and save an upload in a worker thread.
+        
+        Parsing, scanning and hashing are CPU-bound; running them off the
+        event loop keeps other requests responsive during large uploads.
+        """
+        return await asyncio.to_thread(self.save_file, file_content, filename, content_type)
+    
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for secure storage"""
         # Remove path components
         safe_name = Path(filename).name
         
         # Replace dangerous characters
-        dangerous_chars = '<>:"/\\|?*'
-        for char in dangerous_chars:
-            safe_name = safe_name.replace(char, '_')
+        safe_name = safe_name.translate(self._FILENAME_TRANSLATION)
         
         # Limit length
         if len(safe_name) > 100:
-            name_part = Path(safe_name).stem[:90]
-            ext_part = Path(safe_name).suffix
-            safe_name = f"{name_part}{ext_part}"
+            safe_path = Path(safe_name)
+            safe_name = f"{safe_path.stem[:90]}{safe_path.suffix}"
         
         return safe_name
     
@@ -365,25 +477,32 @@ class FileService:
             file_info: File information object
             
         Returns:
-            ExtractedContent with parsed text and metadata
+            ExtractedContent with parsed text and metadata; repeated calls
+            return the content cached on file_info
         """
+        if file_info.extracted is not None:
+            return file_info.extracted
+        
         if not file_info.temp_path or not file_info.temp_path.exists():
             raise FileProcessingError("File not found or already deleted")
         
         try:
-            if file_info.file_format == 'pdf':
-                return self._extract_pdf_text(file_info)
-            elif file_info.file_format == 'docx':
-                return self._extract_docx_text(file_info)
-            elif file_info.file_format == 'txt':
-                return self._extract_text_content(file_info)
-            else:
+            extractor = self._EXTRACTORS.get(file_info.file_format)
+            if extractor is None:
                 raise FileProcessingError(f"Unsupported format: {file_info.file_format}")
+            
+            extracted = getattr(self, extractor)(file_info)
+            file_info.extracted = extracted
+            return extracted
                 
         except Exception as e:
             logger.error(f"Text extraction failed for {file_info.file_id}: {e}")
             raise FileProcessingError(f"Failed to extract text: {str(e)}")
     
+    async def extract_text_async(self, file_info: FileInfo) -> ExtractedContent:
+        """Extract text content in a worker thread, like save_file_async"""
+        return await asyncio.to_thread(self.extract_text, file_info)
+    
     def parse_resume(self, file_info: FileInfo) -> Dict[str, Any]:
         """
         Extract and parse resume with structured data extraction.
@@ -476,6 +595,15 @@ class FileService:
     
     def _extract_pdf_text(self, file_info: FileInfo) -> ExtractedContent:
         """Extract text from PDF file"""
+        if PYMUPDF_AVAILABLE:
+            try:
+                doc = pymupdf.open(file_info.temp_path, filetype="pdf")
+            except Exception as e:
+                logger.warning(f"PyMuPDF could not open {file_info.file_id}, falling back to PyPDF2: {e}")
+            else:
+                with doc:
+                    return self._extract_pymupdf_text(doc)
+        
         with open(file_info.temp_path, 'rb') as pdf_file:
             reader = PyPDF2.PdfReader(pdf_file)
             
@@ -517,39 +645,77 @@ class FileService:
                 extraction_method='PyPDF2'
             )
     
+    def _extract_pymupdf_text(self, doc: "pymupdf.Document") -> ExtractedContent:
+        """Extract text from a PDF document opened with PyMuPDF"""
+        text_parts = []
+        metadata = {
+            'page_count': doc.page_count,
+            'pdf_info': {}
+        }
+        
+        # Extract metadata if available
+        if doc.metadata:
+            metadata['pdf_info'] = {
+                'title': doc.metadata.get('title', ''),
+                'author': doc.metadata.get('author', ''),
+                'creator': doc.metadata.get('creator', ''),
+                'producer': doc.metadata.get('producer', ''),
+                'creation_date': doc.metadata.get('creationDate', '')
+            }
+        
+        # Extract text from all pages
+        for page_num, page in enumerate(doc):
+            try:
+                page_text = page.get_text("text")
+                if page_text:
+                    text_parts.append(page_text)
+            except Exception as e:
+                logger.warning(f"Failed to extract text from page {page_num}: {e}")
+        
+        full_text = '\n'.join(text_parts)
+        
+        # Basic section detection (simple heuristics)
+        sections = self._detect_resume_sections(full_text)
+        
+        return ExtractedContent(
+            text=full_text,
+            metadata=metadata,
+            sections=sections,
+            word_count=len(full_text.split()),
+            extraction_method='PyMuPDF'
+        )
+    
     def _extract_docx_text(self, file_info: FileInfo) -> ExtractedContent:
         """Extract text from DOCX file"""
         doc = Document(file_info.temp_path)
+        # python-docx builds these on every access, so fetch them once
+        paragraphs = doc.paragraphs
+        tables = doc.tables
+        core_properties = doc.core_properties
         
-        text_parts = []
         metadata = {
-            'paragraph_count': len(doc.paragraphs),
-            'table_count': len(doc.tables),
+            'paragraph_count': len(paragraphs),
+            'table_count': len(tables),
             'core_properties': {}
         }
         
         # Extract core properties if available
-        if doc.core_properties:
+        if core_properties:
             metadata['core_properties'] = {
-                'author': doc.core_properties.author or '',
-                'title': doc.core_properties.title or '',
-                'subject': doc.core_properties.subject or '',
-                'created': str(doc.core_properties.created) if doc.core_properties.created else '',
-                'modified': str(doc.core_properties.modified) if doc.core_properties.modified else ''
+                'author': core_properties.author or '',
+                'title': core_properties.title or '',
+                'subject': core_properties.subject or '',
+                'created': str(core_properties.created) if core_properties.created else '',
+                'modified': str(core_properties.modified) if core_properties.modified else ''
             }
         
-        # Extract text from paragraphs
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text_parts.append(para.text)
+        # Extract text from paragraphs; .text walks every run, so read it once
+        text_parts = [text for text in (para.text for para in paragraphs) if text.strip()]
         
         # Extract text from tables
-        for table in doc.tables:
+        for table in tables:
             for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
+                row_text = [text for text in (cell.text.strip() for cell in row.cells) if text]
                 if row_text:
                     text_parts.append(' | '.join(row_text))
         
@@ -568,18 +734,24 @@ class FileService:
     
     def _extract_text_content(self, file_info: FileInfo) -> ExtractedContent:
         """Extract content from text file"""
-        with open(file_info.temp_path, 'rb') as f:
-            content_bytes = f.read()
-        
-        # Detect encoding
-        encoding_result = chardet.detect(content_bytes)
-        encoding = encoding_result['encoding'] or 'utf-8'
-        
-        try:
-            text = content_bytes.decode(encoding)
-        except UnicodeDecodeError:
-            # Fallback to UTF-8 with error handling
-            text = content_bytes.decode('utf-8', errors='replace')
+        # Map the file rather than reading it into a bytes copy; decoding
+        # reads straight from the page cache (empty files cannot be mapped)
+        with open(file_info.temp_path, 'rb') as f, (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.fstat(f.fileno()).st_size else nullcontext(b'')
+        ) as content:
+            try:
+                # Try UTF-8 before detecting the encoding, as in _validate_text
+                text = str(content, 'utf-8')
+                encoding_result = {'encoding': 'utf-8', 'confidence': 1.0}
+            except UnicodeDecodeError:
+                encoding_result = self._detect_encoding(content)
+                try:
+                    text = str(content, encoding_result['encoding'] or 'utf-8')
+                except UnicodeDecodeError:
+                    # Fallback to UTF-8 with error handling
+                    text = str(content, 'utf-8', errors='replace')
+            encoding = encoding_result['encoding'] or 'utf-8'
         
         metadata = {
             'encoding': encoding,
@@ -608,28 +780,17 @@ class FileService:
         current_section = 'header'
         current_content = []
         
-        # Common section headers
-        section_keywords = {
-            'experience': ['experience', 'work history', 'employment', 'professional experience', 'career'],
-            'education': ['education', 'academic', 'qualification', 'degree', 'university', 'college'],
-            'skills': ['skills', 'competencies', 'technical skills', 'expertise', 'proficiencies'],
-            'summary': ['summary', 'profile', 'objective', 'about', 'overview'],
-            'contact': ['contact', 'phone', 'email', 'address', 'linkedin'],
-            'projects': ['projects', 'portfolio', 'achievements', 'accomplishments'],
-            'certifications': ['certifications', 'licenses', 'certificates']
-        }
-        
         for line in text_lines:
-            line_lower = line.lower().strip()
+            stripped = line.strip()
             
-            # Check if line is a section header
+            # Check if line is a section header: relatively short and
+            # starting or ending with a section keyword
             detected_section = None
-            for section_name, keywords in section_keywords.items():
-                if any(keyword in line_lower for keyword in keywords):
-                    # Additional check: line should be relatively short and not contain too much other text
-                    if len(line.strip()) < 100 and any(line_lower.startswith(keyword) or line_lower.endswith(keyword) for keyword in keywords):
-                        detected_section = section_name
-                        break
+            if stripped and len(stripped) < 100:
+                matches = (_SECTION_START_RE.match(stripped), _SECTION_END_RE.match(stripped[::-1]))
+                candidates = [match.lastgroup for match in matches if match]
+                if candidates:
+                    detected_section = min(candidates, key=_SECTION_PRECEDENCE.__getitem__)
             
             if detected_section:
                 # Save previous section
@@ -641,7 +802,7 @@ class FileService:
                 current_content = []
             else:
                 # Add to current section
-                if line.strip():
+                if stripped:
                     current_content.append(line)
         
         # Save last section
@@ -660,6 +821,7 @@ class FileService:
         Returns:
             True if cleanup successful
         """
+        file_info.extracted = None
         try:
             if file_info.temp_path and file_info.temp_path.exists():
                 file_info.temp_path.unlink()
@@ -681,18 +843,21 @@ class FileService:
             Number of files cleaned up
         """
         cleaned_count = 0
-        cutoff_time = datetime.now() - datetime.timedelta(hours=max_age_hours)
+        cutoff_time = (datetime.now() - timedelta(hours=max_age_hours)).timestamp()
         
         try:
-            for file_path in self.temp_dir.glob('file_*'):
-                if file_path.is_file():
-                    file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if file_mtime < cutoff_time:
+            # scandir returns the file type with each entry, so only the
+            # mtime check costs a stat call
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith('file_') or not entry.is_file(follow_symlinks=False):
+                        continue
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
                         try:
-                            file_path.unlink()
+                            os.unlink(entry.path)
                             cleaned_count += 1
                         except Exception as e:
-                            logger.error(f"Failed to delete old file {file_path}: {e}")
+                            logger.error(f"Failed to delete old file {entry.path}: {e}")
             
             if cleaned_count > 0:
                 logger.info(f"Cleaned up {cleaned_count} old temporary files")
@@ -14,8 +14,9 @@ Coordinates the complete 7-step job application analysis workflow:
 import logging
 import asyncio
 import json
+from itertools import islice
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import secrets
@@ -24,11 +25,35 @@ import time
 from services.file_service import get_file_service, FileInfo, FileProcessingError
 from services.claude_service import get_claude_service, ClaudeAPIError, PromptType
 from services.auth_service import SessionData
-from utils.parsers import get_resume_parser, ParsedResume
+from utils.parsers import get_resume_parser, ParsedResume, ContactInfo, WorkExperience, Education, Project
+from utils.compat import DATACLASS_SLOTS
 
 logger = logging.getLogger(__name__)
 
 
+# Company names that mean the job analysis could not identify the company
+_UNKNOWN_COMPANY_NAMES = frozenset({"", "Unknown Company", "Company Not Identified", "Not specified"})
+
+# Field names of the parsed resume records, read once at import
+_CONTACT_FIELDS = tuple(f.name for f in fields(ContactInfo))
+_WORK_FIELDS = tuple(f.name for f in fields(WorkExperience))
+_EDUCATION_FIELDS = tuple(f.name for f in fields(Education))
+_PROJECT_FIELDS = tuple(f.name for f in fields(Project))
+
+
+def _fields_to_dict(record: Any, names: Tuple[str, ...]) -> Dict[str, Any]:
+    """Shallow dict of the named attributes; missing ones become None"""
+    return {name: getattr(record, name, None) for name in names}
+
+
+def _records_to_dicts(records: List[Any], record_type: type, names: Tuple[str, ...]) -> List[Any]:
+    """Convert parser records to dicts, passing other entries through unchanged"""
+    return [
+        _fields_to_dict(record, names) if isinstance(record, record_type) else record
+        for record in records
+    ]
+
+
 class AnalysisStep(Enum):
     """Analysis workflow steps"""
     JOB_ANALYSIS = "job_analysis"
@@ -49,7 +74,7 @@ class AnalysisStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AnalysisProgress:
     """Progress tracking for analysis job"""
     step: AnalysisStep
@@ -60,14 +85,10 @@ class AnalysisProgress:
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
-    details: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.details is None:
-            self.details = {}
+    details: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AnalysisRequest:
     """Request for job analysis"""
     session_id: str
@@ -77,16 +98,12 @@ class AnalysisRequest:
     company_name: Optional[str] = None
     resume_file_id: Optional[str] = None
     resume_text: Optional[str] = None
-    preferences: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.preferences is None:
-            self.preferences = {}
+    preferences: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class AnalysisResult:
-    """Complete analysis results"""
+    """Complete analysis results, immutable once stored"""
     session_id: str
     request: AnalysisRequest
     job_analysis: Dict[str, Any]
@@ -168,7 +185,8 @@ class JobAnalysisService:
         
         # In-memory storage for active jobs (in production, use Redis/database)
         self.active_jobs: Dict[str, Dict[str, Any]] = {}
-        self.job_progress: Dict[str, List[AnalysisProgress]] = {}
+        # Progress per job, keyed by step in workflow order
+        self.job_progress: Dict[str, Dict[AnalysisStep, AnalysisProgress]] = {}
         self.job_results: Dict[str, AnalysisResult] = {}
     
     async def start_analysis(
@@ -217,27 +235,28 @@ class JobAnalysisService:
             preferences=preferences or {}
         )
         
-        # Initialize job tracking
+        # Initialize job tracking; elapsed time is measured on the monotonic clock
+        started_at = datetime.now(timezone.utc)
         self.active_jobs[analysis_id] = {
             "request": request,
             "status": AnalysisStatus.PENDING,
             "current_step": None,
-            "started_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "started_at": started_at,
+            "started_monotonic": time.monotonic(),
+            "updated_at": started_at
         }
         
         # Initialize progress tracking
-        self.job_progress[analysis_id] = []
-        for step in AnalysisStep:
-            config = self.STEP_CONFIG[step]
-            progress = AnalysisProgress(
+        self.job_progress[analysis_id] = {
+            step: AnalysisProgress(
                 step=step,
                 step_number=config["step_number"],
                 step_name=config["step_name"],
                 status=AnalysisStatus.PENDING,
                 progress_percentage=config["progress_percentage"]
             )
-            self.job_progress[analysis_id].append(progress)
+            for step, config in self.STEP_CONFIG.items()
+        }
         
         logger.info(f"Started analysis job {analysis_id} for session {session_data.session_id}")
         
@@ -263,40 +282,64 @@ class JobAnalysisService:
             
             logger.info(f"Starting analysis processing for job {analysis_id}")
             
-            # Execute steps with parallel processing for independent operations
+            # Execute steps as a dependency graph: each step starts as soon as
+            # the results it needs are available, so independent Claude calls
+            # overlap instead of waiting on unrelated phases.
             logger.info("🚀 Starting parallel analysis processing...")
+            tasks: List[asyncio.Task] = []
             
-            # Phase 1: Run job analysis and resume parsing in parallel (independent steps)
-            logger.info("📋 Phase 1: Running job analysis and resume parsing in parallel...")
-            job_analysis_task = asyncio.create_task(self._execute_step_1_job_analysis(analysis_id, request))
-            resume_parsing_task = asyncio.create_task(self._execute_step_3_resume_parsing(analysis_id, request))
+            def spawn(coro) -> asyncio.Task:
+                task = asyncio.create_task(coro)
+                tasks.append(task)
+                return task
             
-            job_analysis_result, parsed_resume_result = await asyncio.gather(
-                job_analysis_task, resume_parsing_task
-            )
-            
-            # Phase 2: Run company research and skills analysis in parallel (both depend on phase 1)
-            logger.info("🔍 Phase 2: Running company research and skills analysis in parallel...")
-            company_research_task = asyncio.create_task(self._execute_step_2_company_research(analysis_id, request, job_analysis_result))
-            skills_analysis_task = asyncio.create_task(self._execute_step_4_skills_analysis(analysis_id, request, job_analysis_result, parsed_resume_result))
-            
-            company_research_result, skills_analysis_result = await asyncio.gather(
-                company_research_task, skills_analysis_task
-            )
-            
-            # Phase 3: Resume enhancement (depends on skills analysis)
-            logger.info("📝 Phase 3: Running resume enhancement...")
-            resume_enhancement_result = await self._execute_step_5_resume_enhancement(analysis_id, request, job_analysis_result, parsed_resume_result, skills_analysis_result)
-            
-            # Phase 4: Cover letter generation (depends on company research)
-            logger.info("✉️ Phase 4: Running cover letter generation...")
-            cover_letter_result = await self._execute_step_6_cover_letter(analysis_id, request, job_analysis_result, company_research_result, parsed_resume_result)
-            
-            # Phase 5: Final review (depends on all previous steps)
-            logger.info("🎯 Phase 5: Running final review...")
+            try:
+                # Job analysis and resume parsing have no dependencies
+                job_analysis_task = spawn(self._execute_step_1_job_analysis(analysis_id, request))
+                resume_parsing_task = spawn(self._execute_step_3_resume_parsing(analysis_id, request))
+                
+                # Company research only needs the job analysis
+                job_analysis_result = await job_analysis_task
+                company_research_task = spawn(self._execute_step_2_company_research(analysis_id, request, job_analysis_result))
+                
+                # Skills analysis needs job analysis and the parsed resume
+                parsed_resume_result = await resume_parsing_task
+                skills_analysis_task = spawn(self._execute_step_4_skills_analysis(analysis_id, request, job_analysis_result, parsed_resume_result))
+                
+                async def resume_enhancement() -> Dict[str, Any]:
+                    skills_analysis = await skills_analysis_task
+                    return await self._execute_step_5_resume_enhancement(analysis_id, request, job_analysis_result, parsed_resume_result, skills_analysis)
+                
+                async def cover_letter() -> Dict[str, Any]:
+                    company_research = await company_research_task
+                    return await self._execute_step_6_cover_letter(analysis_id, request, job_analysis_result, company_research, parsed_resume_result)
+                
+                # Enhancement waits on skills analysis, the cover letter on company research
+                resume_enhancement_result, cover_letter_result = await asyncio.gather(
+                    spawn(resume_enhancement()), spawn(cover_letter())
+                )
+                company_research_result = company_research_task.result()
+                skills_analysis_result = skills_analysis_task.result()
+            except BaseException:
+                # Don't keep paying for Claude calls of a job that already
+                # failed; wait for the cancellations to land, then record the
+                # steps they cut short
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                cancelled_at = datetime.now(timezone.utc)
+                for progress in self.job_progress.get(analysis_id, {}).values():
+                    if progress.status == AnalysisStatus.PROCESSING:
+                        progress.status = AnalysisStatus.CANCELLED
+                        progress.completed_at = cancelled_at
+                raise
+            
+            # Final review (depends on all previous steps)
+            logger.info("🎯 Running final review...")
             final_summary_result = await self._execute_step_7_final_review(analysis_id, request, job_analysis_result, company_research_result, parsed_resume_result, skills_analysis_result, resume_enhancement_result, cover_letter_result)
             
             # Create final result
+            completed_at = datetime.now(timezone.utc)
             result = AnalysisResult(
                 session_id=request.session_id,
                 request=request,
@@ -309,12 +352,12 @@ class JobAnalysisService:
                 final_summary=final_summary_result,
                 processing_metadata={
                     "analysis_id": analysis_id,
-                    "total_processing_time": (datetime.now(timezone.utc) - job["started_at"]).total_seconds(),
+                    "total_processing_time": time.monotonic() - job["started_monotonic"],
                     "steps_completed": 7,
                     "claude_api_calls": self._count_claude_calls(analysis_id)
                 },
                 created_at=job["started_at"],
-                completed_at=datetime.now(timezone.utc)
+                completed_at=completed_at
             )
             
             # Store result
@@ -322,27 +365,19 @@ class JobAnalysisService:
             
             # Update job status
             job["status"] = AnalysisStatus.COMPLETED
-            job["updated_at"] = datetime.now(timezone.utc)
+            job["updated_at"] = completed_at
             
             logger.info(f"Analysis job {analysis_id} completed successfully")
             
         except Exception as e:
             logger.error(f"Analysis job {analysis_id} failed: {e}")
             
-            # Update job status to failed
+            # Update job status to failed; each step records its own failure
+            # and steps cut short were marked cancelled above
             job = self.active_jobs.get(analysis_id, {})
             job["status"] = AnalysisStatus.FAILED
             job["error"] = str(e)
             job["updated_at"] = datetime.now(timezone.utc)
-            
-            # Mark current step as failed
-            progress_list = self.job_progress.get(analysis_id, [])
-            for progress in progress_list:
-                if progress.status == AnalysisStatus.PROCESSING:
-                    progress.status = AnalysisStatus.FAILED
-                    progress.error_message = str(e)
-                    progress.completed_at = datetime.now(timezone.utc)
-                    break
     
     async def _execute_step_1_job_analysis(self, analysis_id: str, request: AnalysisRequest) -> Dict[str, Any]:
         """Execute Step 1: Job Description Analysis"""
@@ -357,7 +392,7 @@ class JobAnalysisService:
             
             # Parse Claude response (expecting JSON)
             try:
-                job_analysis = json.loads(claude_result.response_text)
+                job_analysis = claude_result.parsed
             except json.JSONDecodeError:
                 # If not valid JSON, create structured response
                 job_analysis = {
@@ -387,10 +422,12 @@ class JobAnalysisService:
         await self._update_step_status(analysis_id, AnalysisStep.COMPANY_RESEARCH, AnalysisStatus.PROCESSING)
         
         try:
-            # Extract company name from job analysis
-            company_name = job_analysis.get("company_name", "Unknown Company")
+            # Extract company name from job analysis; placeholders left by the
+            # step 1 fallback are not worth a Claude call
+            company_name = job_analysis.get("company_name")
+            company_identified = isinstance(company_name, str) and company_name.strip() not in _UNKNOWN_COMPANY_NAMES
             
-            if company_name and company_name != "Unknown Company":
+            if company_identified:
                 # Use Claude API for company research
                 claude_result = await self.claude_service.research_company(
                     company_name=company_name,
@@ -398,7 +435,7 @@ class JobAnalysisService:
                 )
                 
                 try:
-                    company_research = json.loads(claude_result.response_text)
+                    company_research = claude_result.parsed
                 except json.JSONDecodeError:
                     company_research = {
                         "company_name": company_name,
@@ -417,8 +454,8 @@ class JobAnalysisService:
             
             # Add metadata
             company_research["_metadata"] = {
-                "research_method": "claude_api" if company_name != "Unknown Company" else "fallback",
-                "company_identified": company_name != "Unknown Company"
+                "research_method": "claude_api" if company_identified else "fallback",
+                "company_identified": company_identified
             }
             
             await self._update_step_status(analysis_id, AnalysisStep.COMPANY_RESEARCH, AnalysisStatus.COMPLETED)
@@ -454,50 +491,21 @@ class JobAnalysisService:
                 # Parse text directly
                 parsed_resume_obj = self.resume_parser.parse_resume(request.resume_text)
                 
-                # Convert to dictionary for JSON serialization
-                try:
-                    parsed_resume = {
-                        "source": "text_input",
-                        "contact_info": asdict(parsed_resume_obj.contact_info) if hasattr(parsed_resume_obj.contact_info, '__dataclass_fields__') else {
-                            "email": getattr(parsed_resume_obj.contact_info, 'email', None),
-                            "phone": getattr(parsed_resume_obj.contact_info, 'phone', None),
-                            "linkedin": getattr(parsed_resume_obj.contact_info, 'linkedin', None),
-                            "github": getattr(parsed_resume_obj.contact_info, 'github', None),
-                            "website": getattr(parsed_resume_obj.contact_info, 'website', None),
-                            "address": getattr(parsed_resume_obj.contact_info, 'address', None)
-                        },
-                        "summary": parsed_resume_obj.summary,
-                        "work_experience": [asdict(exp) if hasattr(exp, '__dataclass_fields__') else exp for exp in parsed_resume_obj.work_experience],
-                        "education": [asdict(edu) if hasattr(edu, '__dataclass_fields__') else edu for edu in parsed_resume_obj.education],
-                        "skills": parsed_resume_obj.skills,
-                        "projects": [asdict(proj) if hasattr(proj, '__dataclass_fields__') else proj for proj in parsed_resume_obj.projects],
-                        "certifications": parsed_resume_obj.certifications,
-                        "languages": parsed_resume_obj.languages,
-                        "sections": parsed_resume_obj.sections,
-                        "metadata": parsed_resume_obj.metadata
-                    }
-                except Exception as e:
-                    # Fallback for different object types or attribute access
-                    parsed_resume = {
-                        "source": "text_input",
-                        "contact_info": {
-                            "email": getattr(parsed_resume_obj.contact_info, 'email', None),
-                            "phone": getattr(parsed_resume_obj.contact_info, 'phone', None),
-                            "linkedin": getattr(parsed_resume_obj.contact_info, 'linkedin', None),
-                            "github": getattr(parsed_resume_obj.contact_info, 'github', None),
-                            "website": getattr(parsed_resume_obj.contact_info, 'website', None),
-                            "address": getattr(parsed_resume_obj.contact_info, 'address', None)
-                        },
-                        "summary": getattr(parsed_resume_obj, 'summary', ''),
-                        "work_experience": getattr(parsed_resume_obj, 'work_experience', []),
-                        "education": getattr(parsed_resume_obj, 'education', []),
-                        "skills": getattr(parsed_resume_obj, 'skills', []),
-                        "projects": getattr(parsed_resume_obj, 'projects', []),
-                        "certifications": getattr(parsed_resume_obj, 'certifications', []),
-                        "languages": getattr(parsed_resume_obj, 'languages', []),
-                        "sections": getattr(parsed_resume_obj, 'sections', {}),
-                        "metadata": getattr(parsed_resume_obj, 'metadata', {})
-                    }
+                # Convert to dictionary for JSON serialization. Records are
+                # copied field by field; asdict() would deep-copy every value.
+                parsed_resume = {
+                    "source": "text_input",
+                    "contact_info": _fields_to_dict(parsed_resume_obj.contact_info, _CONTACT_FIELDS),
+                    "summary": parsed_resume_obj.summary,
+                    "work_experience": _records_to_dicts(parsed_resume_obj.work_experience, WorkExperience, _WORK_FIELDS),
+                    "education": _records_to_dicts(parsed_resume_obj.education, Education, _EDUCATION_FIELDS),
+                    "skills": parsed_resume_obj.skills,
+                    "projects": _records_to_dicts(parsed_resume_obj.projects, Project, _PROJECT_FIELDS),
+                    "certifications": parsed_resume_obj.certifications,
+                    "languages": parsed_resume_obj.languages,
+                    "sections": parsed_resume_obj.sections,
+                    "metadata": parsed_resume_obj.metadata
+                }
             else:
                 raise JobAnalysisError("No resume data provided")
             
@@ -542,7 +550,7 @@ class JobAnalysisService:
             )
             
             try:
-                skills_analysis = json.loads(claude_result.response_text)
+                skills_analysis = claude_result.parsed
             except json.JSONDecodeError:
                 skills_analysis = {
                     "current_skills": current_skills,
@@ -573,7 +581,7 @@ class JobAnalysisService:
             # Prepare resume content for analysis
             resume_summary = f"""
             Contact: {parsed_resume.get('contact_info', {}).get('email', 'Not provided')}
-            Skills: {', '.join(parsed_resume.get('skills', [])[:10])}
+            Skills: {', '.join(islice(parsed_resume.get('skills', []), 10))}
             Experience: {len(parsed_resume.get('work_experience', []))} positions
             Education: {len(parsed_resume.get('education', []))} entries
             """
@@ -588,7 +596,7 @@ class JobAnalysisService:
             )
             
             try:
-                resume_recommendations = json.loads(claude_result.response_text)
+                resume_recommendations = claude_result.parsed
             except json.JSONDecodeError:
                 resume_recommendations = {
                     "overall_score": 7.0,
@@ -632,7 +640,7 @@ class JobAnalysisService:
             resume_summary = f"""
             Name: {parsed_resume.get('contact_info', {}).get('email', 'Candidate')}
             Experience: {len(parsed_resume.get('work_experience', []))} positions
-            Key Skills: {', '.join(parsed_resume.get('skills', [])[:8])}
+            Key Skills: {', '.join(islice(parsed_resume.get('skills', []), 8))}
             Education: {len(parsed_resume.get('education', []))} degrees/certifications
             """
             
@@ -715,26 +723,24 @@ class JobAnalysisService:
     
     async def _update_step_status(self, analysis_id: str, step: AnalysisStep, status: AnalysisStatus, error_message: Optional[str] = None) -> None:
         """Update progress status for a specific step"""
-        progress_list = self.job_progress.get(analysis_id, [])
+        progress = self.job_progress.get(analysis_id, {}).get(step)
+        now = datetime.now(timezone.utc)
         
-        for progress in progress_list:
-            if progress.step == step:
-                progress.status = status
-                
-                if status == AnalysisStatus.PROCESSING:
-                    progress.started_at = datetime.now(timezone.utc)
-                elif status in [AnalysisStatus.COMPLETED, AnalysisStatus.FAILED]:
-                    progress.completed_at = datetime.now(timezone.utc)
-                
-                if error_message:
-                    progress.error_message = error_message
-                
-                break
+        if progress:
+            progress.status = status
+            
+            if status == AnalysisStatus.PROCESSING:
+                progress.started_at = now
+            elif status in [AnalysisStatus.COMPLETED, AnalysisStatus.FAILED]:
+                progress.completed_at = now
+            
+            if error_message:
+                progress.error_message = error_message
         
         # Update job current step
         job = self.active_jobs.get(analysis_id, {})
         job["current_step"] = step
-        job["updated_at"] = datetime.now(timezone.utc)
+        job["updated_at"] = now
     
     def _calculate_job_match_score(self, job_analysis: Dict[str, Any], parsed_resume: Dict[str, Any], skills_analysis: Dict[str, Any]) -> float:
         """Calculate a job match score based on analysis results"""
@@ -794,7 +800,7 @@ class JobAnalysisService:
             return None
         
         job = self.active_jobs[analysis_id]
-        progress_list = self.job_progress.get(analysis_id, [])
+        progress_list = list(self.job_progress.get(analysis_id, {}).values())
         
         # Calculate overall progress
         completed_steps = sum(1 for p in progress_list if p.status == AnalysisStatus.COMPLETED)
@@ -844,8 +850,7 @@ class JobAnalysisService:
         job["updated_at"] = datetime.now(timezone.utc)
         
         # Mark current step as cancelled
-        progress_list = self.job_progress.get(analysis_id, [])
-        for progress in progress_list:
+        for progress in self.job_progress.get(analysis_id, {}).values():
             if progress.status == AnalysisStatus.PROCESSING:
                 progress.status = AnalysisStatus.CANCELLED
                 progress.completed_at = datetime.now(timezone.utc)
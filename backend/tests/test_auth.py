@@ -2,17 +2,23 @@
 Tests for authentication system.
 """
 
+import base64
+import hashlib
+import hmac
 import pytest
 import jwt
 from datetime import datetime, timezone, timedelta
 from unittest.mock import patch, MagicMock
+from jwt.algorithms import HMACAlgorithm
 
 from services.auth_service import (
     SessionData,
     JWTTokenManager,
     SessionManager,
     AuthenticationError,
-    TokenExpiredError
+    TokenExpiredError,
+    ORJSON_AVAILABLE,
+    _OrjsonPyJWT
 )
 from config.security import SecurityUtils
 
@@ -65,6 +71,42 @@ class TestSessionData:
         assert restored.created_at == original.created_at
         assert restored.expires_at == original.expires_at
 
+    def test_session_from_payload(self):
+        """Test building session data from a JWT payload"""
+        session = SessionData.from_payload({
+            'session_id': 'payload-session',
+            'user_id': 'test-user',
+            'created_at': 1700000000,
+            'expires_at': 1700001800,
+            'permissions': ['read']
+        })
+
+        assert session.session_id == 'payload-session'
+        assert session.permissions == ['read']
+        assert session.created_at == datetime.fromtimestamp(1700000000, tz=timezone.utc)
+        assert session.expires_at == datetime.fromtimestamp(1700001800, tz=timezone.utc)
+
+    def test_session_timestamp_properties(self):
+        """Test datetime views over the integer timestamps"""
+        session = SessionData(session_id="test-session")
+        new_expiry = datetime.now(timezone.utc) + timedelta(hours=2)
+
+        session.expires_at = new_expiry
+
+        assert session.expires_ts == int(new_expiry.timestamp())
+        assert session.expires_at == datetime.fromtimestamp(int(new_expiry.timestamp()), tz=timezone.utc)
+        assert session.created_at.tzinfo is not None
+        assert session.expires_ts - session.created_ts > 0
+
+    def test_created_isoformat_follows_timestamp(self):
+        """Test the cached ISO creation time tracks writes to created_ts"""
+        session = SessionData(session_id="test-session", created_ts=1700000000)
+        assert session.created_at_isoformat() == datetime.fromtimestamp(1700000000, tz=timezone.utc).isoformat()
+
+        session.created_ts = 1700003600
+
+        assert session.created_at_isoformat() == datetime.fromtimestamp(1700003600, tz=timezone.utc).isoformat()
+
 
 class TestJWTTokenManager:
     """Test JWT token management"""
@@ -158,7 +200,79 @@ class TestJWTTokenManager:
         
         with pytest.raises(TokenExpiredError):
             token_manager.validate_token(token)
-    
+
+    def test_token_missing_required_claims(self):
+        """Test tokens without required claims or issuer are rejected"""
+        mock_security = MagicMock()
+        mock_security.jwt_secret = "test-secret-key"
+
+        token_manager = JWTTokenManager(mock_security)
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        # Missing session_id claim
+        token = jwt.encode(
+            {"exp": expires, "iat": datetime.now(timezone.utc), "iss": "careercraft-ai"},
+            "test-secret-key",
+            algorithm="HS256"
+        )
+        with pytest.raises(AuthenticationError):
+            token_manager.validate_token(token)
+
+        # Wrong issuer
+        token = jwt.encode(
+            {"session_id": "test", "exp": expires, "iat": datetime.now(timezone.utc), "iss": "someone-else"},
+            "test-secret-key",
+            algorithm="HS256"
+        )
+        with pytest.raises(AuthenticationError):
+            token_manager.validate_token(token)
+
+    def test_decode_token_unsafe(self):
+        """Test unverified payload inspection"""
+        mock_security = MagicMock()
+        mock_security.jwt_secret = "test-secret-key"
+        token_manager = JWTTokenManager(mock_security)
+
+        token = jwt.encode(
+            {"session_id": "inspect-me", "exp": datetime.now(timezone.utc) - timedelta(hours=1)},
+            "some-other-secret",
+            algorithm="HS256"
+        )
+
+        assert token_manager.decode_token_unsafe(token)["session_id"] == "inspect-me"
+        assert token_manager.decode_token_unsafe("not-a-token") == {}
+
+    def test_token_signature_matches_stock_hs256(self):
+        """Test tokens are signed with plain HMAC-SHA256 without touching PyJWT's registry"""
+        mock_security = MagicMock()
+        mock_security.jwt_secret = "test-secret-key"
+        mock_security.session_timeout = 30
+
+        token_manager = JWTTokenManager(mock_security)
+        token = token_manager.generate_token(SessionData(session_id="sig-session"))
+
+        header, payload, signature = token.split(".")
+        expected = hmac.new(b"test-secret-key", f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        assert signature == base64.urlsafe_b64encode(expected).rstrip(b"=").decode()
+        assert type(jwt.api_jws._jws_global_obj._algorithms["HS256"]) is HMACAlgorithm
+
+    @pytest.mark.skipif(not ORJSON_AVAILABLE, reason="orjson not installed")
+    def test_orjson_codec_matches_pyjwt(self):
+        """Test the orjson codec round-trips tokens with stock PyJWT"""
+        payload = {"session_id": "codec-session", "permissions": ["read"], "iat": 1700000000}
+        codec = _OrjsonPyJWT(b"test-secret-key")
+
+        stock_token = jwt.PyJWT().encode(payload, "test-secret-key", algorithm="HS256")
+        assert codec.decode(stock_token, "test-secret-key", algorithms=["HS256"]) == payload
+
+        orjson_token = codec.encode(payload, "test-secret-key", algorithm="HS256")
+        assert jwt.PyJWT().decode(orjson_token, "test-secret-key", algorithms=["HS256"]) == payload
+
+        malformed = stock_token.split(".")
+        malformed[1] = "bm90IGpzb24"  # base64url of "not json"
+        with pytest.raises(jwt.DecodeError):
+            codec.decode(".".join(malformed), "test-secret-key", algorithms=["HS256"], options={"verify_signature": False})
+
     def test_token_refresh(self):
         """Test JWT token refresh"""
         # Mock configuration
@@ -243,7 +357,46 @@ class TestSessionManager:
         # Revoking again should return False
         result = manager.revoke_session("test-session")
         assert result is False
-    
+
+    def test_revoked_token_rejected_before_verification(self):
+        """Test revoked session tokens skip the verified decode"""
+        mock_security = MagicMock()
+        mock_security.jwt_secret = "test-secret-key"
+        manager = SessionManager(JWTTokenManager(mock_security))
+
+        token, _ = manager.create_session("test-session", "test-user")
+        manager.revoke_session("test-session")
+
+        with patch.object(manager.jwt_manager, 'validate_token') as mock_validate:
+            with pytest.raises(AuthenticationError, match="revoked"):
+                manager.validate_session(token)
+            mock_validate.assert_not_called()
+
+    def test_revoked_sessions_pruned_after_expiry(self):
+        """Test revoked IDs are forgotten once their tokens have expired"""
+        mock_security = MagicMock()
+        mock_security.jwt_secret = "test-secret-key"
+        manager = SessionManager(JWTTokenManager(mock_security))
+        past_time = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        for i in range(1000):
+            manager.active_sessions[f"old-{i}"] = SessionData(session_id=f"old-{i}", expires_at=past_time)
+            manager.revoke_session(f"old-{i}")
+        token, _ = manager.create_session("live-session", "test-user")
+
+        assert manager._revoked == {}
+
+        # With nothing outstanding, validation doesn't peek at the payload
+        with patch.object(manager.jwt_manager, 'decode_token_unsafe') as mock_peek:
+            assert manager.validate_session(token).session_id == "live-session"
+            mock_peek.assert_not_called()
+
+        # A revoked session with a live token stays tracked until it expires
+        manager.revoke_session("live-session")
+        assert "live-session" in manager._revoked
+        with pytest.raises(AuthenticationError, match="revoked"):
+            manager.validate_session(token)
+
     def test_expired_session_cleanup(self):
         """Test cleanup of expired sessions"""
         manager = SessionManager()
@@ -268,7 +421,59 @@ class TestSessionManager:
         assert len(manager.active_sessions) == 1
         assert "valid-session" in manager.active_sessions
         assert "expired-session" not in manager.active_sessions
-    
+
+    def test_cleanup_skips_extended_and_revoked_sessions(self):
+        """Test cleanup ignores stale expiry entries"""
+        manager = SessionManager()
+        past_time = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        # Session whose expiry is extended after it was stored
+        extended = SessionData(session_id="extended-session", expires_at=past_time)
+        manager.active_sessions["extended-session"] = extended
+        extended.expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        # Expired session that was already revoked
+        manager.active_sessions["revoked-session"] = SessionData(
+            session_id="revoked-session", expires_at=past_time
+        )
+        manager.revoke_session("revoked-session")
+
+        assert manager.cleanup_expired_sessions() == 0
+        assert "extended-session" in manager.active_sessions
+
+    def test_cleanup_does_not_duplicate_refreshed_entries(self):
+        """Test a refreshed session keeps a single live heap entry"""
+        manager = SessionManager()
+        past_time = datetime.now(timezone.utc) - timedelta(hours=1)
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        manager.active_sessions["refreshed-session"] = SessionData(
+            session_id="refreshed-session", expires_at=past_time
+        )
+        # Refresh stores a new SessionData, as refresh_session does
+        manager.active_sessions["refreshed-session"] = SessionData(
+            session_id="refreshed-session", expires_at=future_time
+        )
+
+        assert manager.cleanup_expired_sessions() == 0
+        assert manager.cleanup_expired_sessions() == 0
+        assert manager.active_sessions.expiry_heap == [(int(future_time.timestamp()), "refreshed-session")]
+
+    def test_session_store_update_schedules_expiry(self):
+        """Test sessions added through update/setdefault are scheduled"""
+        manager = SessionManager()
+        past_time = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        manager.active_sessions.update({
+            "updated-session": SessionData(session_id="updated-session", expires_at=past_time)
+        })
+        manager.active_sessions.setdefault(
+            "defaulted-session", SessionData(session_id="defaulted-session", expires_at=past_time)
+        )
+
+        assert manager.cleanup_expired_sessions() == 2
+        assert len(manager.active_sessions) == 0
+
     def test_list_active_sessions(self):
         """Test listing active sessions"""
         manager = SessionManager()
@@ -285,6 +490,7 @@ class TestSessionManager:
         assert "session2" in sessions
         assert sessions["session1"]["user_id"] == "user1"
         assert sessions["session2"]["user_id"] == "user2"
+        assert sessions["session1"]["created_at"] == manager.get_session_info("session1").created_at.isoformat()
 
 
 class TestSecurityIntegration:
@@ -4,6 +4,11 @@ Tests for Claude API integration service.
 
 import pytest
 import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import anthropic
+import httpx
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Mock configuration before importing Claude service
@@ -19,22 +24,37 @@ with patch('services.claude_service.get_config') as mock_config:
         ClaudeAPIError,
         PromptType,
         AnalysisResult,
-        get_claude_service
+        get_claude_service,
+        close_claude_service,
+        _create_claude_service,
+        _PROMPT_RENDERERS,
+        _compile_template
     )
 
 
+def mock_stream_manager(response, chunks=None):
+    """Build a mock `messages.stream` context manager streaming the response text"""
+    async def text_stream():
+        for text in chunks if chunks is not None else [block.text for block in response.content]:
+            yield text
+    
+    stream = MagicMock()
+    stream.text_stream = text_stream()
+    stream.get_final_message = AsyncMock(return_value=response)
+    manager = MagicMock()
+    manager.__aenter__.return_value = stream
+    return manager
+
+
 class TestClaudeService:
     """Test Claude API service functionality"""
     
-    @patch('services.claude_service.Anthropic')
     @patch('services.claude_service.AsyncAnthropic')
-    def setup_method(self, mock_async_anthropic, mock_anthropic):
-        """Setup test environment with mocked Claude clients"""
-        # Mock the clients
-        self.mock_sync_client = MagicMock()
+    def setup_method(self, mock_async_anthropic):
+        """Setup test environment with mocked Claude client"""
+        # Mock the client
         self.mock_async_client = AsyncMock()
         
-        mock_anthropic.return_value = self.mock_sync_client
         mock_async_anthropic.return_value = self.mock_async_client
         
         # Create service instance
@@ -48,7 +68,7 @@ class TestClaudeService:
     def test_service_initialization(self):
         """Test Claude service initialization"""
         assert self.claude_service is not None
-        assert hasattr(self.claude_service, 'sync_client')
+        assert not hasattr(self.claude_service, 'sync_client')
         assert hasattr(self.claude_service, 'async_client')
         assert hasattr(self.claude_service, 'prompts')
         
@@ -79,7 +99,7 @@ class TestClaudeService:
         stats = self.claude_service.get_usage_stats()
         assert stats['requests_last_minute'] == 0
         assert stats['tokens_last_minute'] == 0
-        assert stats['requests_remaining'] == self.claude_service.REQUESTS_PER_MINUTE
+        assert stats['models'][ClaudeService.DEFAULT_MODEL]['requests_remaining'] == self.claude_service.REQUESTS_PER_MINUTE
         
         # Test recording usage
         self.claude_service._record_usage(100)
@@ -96,7 +116,7 @@ class TestClaudeService:
         mock_response.usage.input_tokens = 100
         mock_response.usage.output_tokens = 200
         
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(mock_response))
         
         # Test job analysis
         result = await self.claude_service.analyze_job_description(
@@ -109,8 +129,8 @@ class TestClaudeService:
         assert "Software Engineer" in result.response_text
         
         # Verify API was called correctly
-        self.mock_async_client.messages.create.assert_called_once()
-        call_args = self.mock_async_client.messages.create.call_args
+        self.mock_async_client.messages.stream.assert_called_once()
+        call_args = self.mock_async_client.messages.stream.call_args
         assert call_args[1]['model'] == self.claude_service.DEFAULT_MODEL
         assert call_args[1]['max_tokens'] == self.claude_service.MAX_TOKENS
     
@@ -134,7 +154,7 @@ class TestClaudeService:
         mock_response.usage.input_tokens = 80
         mock_response.usage.output_tokens = 150
         
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(mock_response))
         
         # Test company research
         result = await self.claude_service.research_company(
@@ -155,7 +175,7 @@ class TestClaudeService:
         mock_response.usage.input_tokens = 200
         mock_response.usage.output_tokens = 300
         
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(mock_response))
         
         # Test resume analysis
         resume_content = "John Doe, Software Engineer with 5 years Python experience. Built web applications using Django and React. Led team of 3 developers."
@@ -179,7 +199,7 @@ class TestClaudeService:
         mock_response.usage.input_tokens = 150
         mock_response.usage.output_tokens = 250
         
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(mock_response))
         
         # Test cover letter generation
         result = await self.claude_service.generate_cover_letter(
@@ -203,7 +223,7 @@ class TestClaudeService:
         mock_response.usage.input_tokens = 120
         mock_response.usage.output_tokens = 180
         
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(mock_response))
         
         # Test skills analysis
         result = await self.claude_service.analyze_skills_gap(
@@ -222,7 +242,7 @@ class TestClaudeService:
         from anthropic import APIError
         
         # Mock API error
-        self.mock_async_client.messages.create = AsyncMock(
+        self.mock_async_client.messages.stream = MagicMock(
             side_effect=APIError("API request failed")
         )
         
@@ -236,17 +256,11 @@ class TestClaudeService:
     async def test_streaming_analysis(self):
         """Test streaming analysis functionality"""
         # Mock streaming response
-        async def mock_stream():
-            chunks = [
-                MagicMock(type="content_block_delta", delta=MagicMock(text="This is ")),
-                MagicMock(type="content_block_delta", delta=MagicMock(text="a streaming ")),
-                MagicMock(type="content_block_delta", delta=MagicMock(text="response.")),
-                MagicMock(type="message_delta", usage=MagicMock(output_tokens=50))
-            ]
-            for chunk in chunks:
-                yield chunk
-        
-        self.mock_async_client.messages.create = AsyncMock(return_value=mock_stream())
+        final_message = MagicMock(usage=MagicMock(input_tokens=10, output_tokens=50))
+        self.mock_async_client.messages.stream = MagicMock(return_value=mock_stream_manager(
+            final_message,
+            chunks=["This is ", "a streaming ", "response."]
+        ))
         
         # Test streaming
         chunks = []
@@ -256,7 +270,7 @@ class TestClaudeService:
         ):
             chunks.append(chunk)
         
-        assert chunks == ["This is ", "a streaming ", "response."]
+        assert "".join(chunks) == "This is a streaming response."
     
     def test_singleton_pattern(self):
         """Test Claude service singleton pattern"""
@@ -274,6 +288,30 @@ class TestPromptFormatting:
         with patch('services.claude_service.get_config'):
             self.claude_service = ClaudeService()
     
+    def test_templates_are_shared_and_read_only(self):
+        """Test every instance uses the same read-only template mapping"""
+        with patch('services.claude_service.get_config'):
+            other = ClaudeService()
+        
+        assert other.prompts is self.claude_service.prompts
+        with pytest.raises(TypeError):
+            self.claude_service.prompts[PromptType.JOB_ANALYSIS] = "changed"
+    
+    def test_compiled_renderers_match_format(self):
+        """Test pre-compiled renderers produce the same text as str.format"""
+        fields = {
+            "job_description": "Software Engineer", "company_name": "TechCorp", "context": "AI",
+            "resume_content": "Python developer", "job_requirements": "Python", "company_info": "Startup",
+            "resume_summary": "Engineer", "tone": "professional", "focus_areas": "leadership",
+            "current_skills": "Python, SQL", "industry": "Technology"
+        }
+        
+        for prompt_type, template in self.claude_service.prompts.items():
+            assert _PROMPT_RENDERERS[prompt_type](**fields) == template.format(**fields)
+        
+        with pytest.raises(ValueError):
+            _compile_template("{value!r}")
+    
     def test_job_analysis_prompt_formatting(self):
         """Test job analysis prompt formatting"""
         job_desc = "Software Engineer position requiring Python and React"
@@ -301,6 +339,673 @@ class TestPromptFormatting:
         assert "technical skills, leadership" in formatted
 
 
+class TestModelSelection:
+    """Test model tier routing"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+    
+    def test_short_lookup_prompts_use_fast_tier(self):
+        """Test short company research and skills prompts use the fast model"""
+        fast = self.claude_service.MODEL_TIERS["fast"]
+        assert self.claude_service._select_model(PromptType.COMPANY_RESEARCH, 200) == fast
+        assert self.claude_service._select_model(PromptType.SKILLS_ANALYSIS, 3999) == fast
+    
+    def test_heavy_prompts_use_deep_tier(self):
+        """Test long prompts and generation tasks use the deep model"""
+        deep = self.claude_service.MODEL_TIERS["deep"]
+        assert self.claude_service._select_model(PromptType.SKILLS_ANALYSIS, 4000) == deep
+        assert self.claude_service._select_model(PromptType.RESUME_ANALYSIS, 100) == deep
+        assert self.claude_service._select_model(PromptType.COVER_LETTER, 100) == deep
+        assert self.claude_service._select_model(PromptType.JOB_ANALYSIS, 100) == deep
+
+
+class TestRateLimiting:
+    """Test sliding-window usage tracking"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+    
+    def test_expired_usage_leaves_window(self):
+        """Test entries older than a minute are dropped from the running totals"""
+        with patch('services.claude_service.time.monotonic', return_value=1000.0):
+            self.claude_service._record_usage(300)
+        with patch('services.claude_service.time.monotonic', return_value=1030.0):
+            self.claude_service._record_usage(200)
+            assert self.claude_service.get_usage_stats()["tokens_last_minute"] == 500
+        
+        with patch('services.claude_service.time.monotonic', return_value=1060.0):
+            stats = self.claude_service.get_usage_stats()
+        assert stats["requests_last_minute"] == 1
+        assert stats["tokens_last_minute"] == 200
+        assert len(self.claude_service._usage_window().token_usage) == 1
+    
+    @pytest.mark.asyncio
+    async def test_full_window_waits_without_blocking(self):
+        """Test a full request window waits with asyncio.sleep until the oldest entry expires"""
+        with patch('services.claude_service.time.monotonic', return_value=1000.0):
+            for _ in range(self.claude_service.REQUESTS_PER_MINUTE):
+                self.claude_service._record_usage(1)
+        
+        with patch('services.claude_service.time.monotonic', return_value=1010.0) as mock_time, \
+             patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep, \
+             patch('services.claude_service.time.sleep') as mock_blocking_sleep:
+            mock_sleep.side_effect = lambda seconds: setattr(mock_time, "return_value", 1010.0 + seconds)
+            await self.claude_service._check_rate_limits()
+        
+        mock_sleep.assert_awaited_once_with(50.0)
+        mock_blocking_sleep.assert_not_called()
+        assert list(self.claude_service._usage_window().request_times) == [1060.0]
+    
+    @pytest.mark.asyncio
+    async def test_estimated_tokens_reserved_before_send(self):
+        """Test a request waits when its estimated tokens would overflow the window"""
+        limit = self.claude_service.TOKENS_PER_MINUTE
+        with patch('services.claude_service.time.monotonic', return_value=1000.0):
+            self.claude_service._record_usage(limit - 100)
+        
+        with patch('services.claude_service.time.monotonic', return_value=1010.0) as mock_time, \
+             patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            mock_sleep.side_effect = lambda seconds: setattr(mock_time, "return_value", 1010.0 + seconds)
+            await self.claude_service._check_rate_limits(tokens_required=500)
+            
+            mock_sleep.assert_awaited_once_with(50.0)
+            stats = self.claude_service.get_usage_stats()
+            assert stats["tokens_last_minute"] == 500
+            
+            self.claude_service._record_tokens(1200 - 500)
+            assert self.claude_service.get_usage_stats()["tokens_last_minute"] == 1200
+    
+    @pytest.mark.asyncio
+    async def test_models_have_separate_windows(self):
+        """Test a full window for one model does not hold up another model"""
+        deep_model = self.claude_service.MODEL_TIERS["deep"]
+        fast_model = self.claude_service.MODEL_TIERS["fast"]
+        with patch('services.claude_service.time.monotonic', return_value=1000.0):
+            for _ in range(self.claude_service.REQUESTS_PER_MINUTE):
+                self.claude_service._record_usage(1, model=deep_model)
+        
+        with patch('services.claude_service.time.monotonic', return_value=1010.0), \
+             patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await self.claude_service._check_rate_limits(100, model=fast_model)
+            stats = self.claude_service.get_usage_stats()
+        
+        mock_sleep.assert_not_awaited()
+        assert stats["models"][deep_model]["requests_remaining"] == 0
+        assert stats["models"][fast_model]["requests_last_minute"] == 1
+        assert stats["models"][fast_model]["tokens_last_minute"] == 100
+        # Top-level figures stay those of the default model, not a sum
+        assert stats["requests_last_minute"] == self.claude_service.REQUESTS_PER_MINUTE
+        assert stats["requests_limit"] == self.claude_service.REQUESTS_PER_MINUTE
+        assert stats["tokens_limit"] == self.claude_service.TOKENS_PER_MINUTE
+    
+    @pytest.mark.asyncio
+    async def test_model_rate_limit_override(self):
+        """Test MODEL_RATE_LIMITS replaces the default limits for a model"""
+        fast_model = self.claude_service.MODEL_TIERS["fast"]
+        self.claude_service.MODEL_RATE_LIMITS = {fast_model: (1, 1000)}
+        with patch('services.claude_service.time.monotonic', return_value=1000.0):
+            self.claude_service._record_usage(1, model=fast_model)
+        
+        with patch('services.claude_service.time.monotonic', return_value=1010.0) as mock_time, \
+             patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            mock_sleep.side_effect = lambda seconds: setattr(mock_time, "return_value", 1010.0 + seconds)
+            await self.claude_service._check_rate_limits(model=fast_model)
+        
+        mock_sleep.assert_awaited_once_with(50.0)
+        assert self.claude_service.get_usage_stats()["models"][fast_model]["requests_limit"] == 1
+
+
+class TestBatchAnalysis:
+    """Test Message Batches submissions"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+        self.claude_service.async_client = MagicMock()
+        self.claude_service.BATCH_POLL_INTERVAL = 0
+    
+    @staticmethod
+    def batch_entry(custom_id, text=None):
+        """Build a batch result entry; entries without text have errored"""
+        entry = MagicMock()
+        entry.custom_id = custom_id
+        if text is None:
+            entry.result.type = "errored"
+        else:
+            entry.result.type = "succeeded"
+            entry.result.message.content = [MagicMock(type="text", text=text)]
+            entry.result.message.usage.input_tokens = 10
+            entry.result.message.usage.output_tokens = 5
+        return entry
+    
+    def mock_batches(self, entries):
+        """Wire a batch that finishes on the second status check"""
+        async def results():
+            for entry in entries:
+                yield entry
+        
+        batches = self.claude_service.async_client.messages.batches
+        batches.create = AsyncMock(return_value=MagicMock(id="batch-1", processing_status="in_progress"))
+        batches.retrieve = AsyncMock(return_value=MagicMock(id="batch-1", processing_status="ended"))
+        batches.results = AsyncMock(return_value=results())
+        return batches
+    
+    @pytest.mark.asyncio
+    async def test_results_follow_job_order(self):
+        """Test results are mapped back to their jobs by custom_id"""
+        batches = self.mock_batches([self.batch_entry("job-1", "second"), self.batch_entry("job-0", "first")])
+        jobs = [
+            (PromptType.COMPANY_RESEARCH, "Research TechCorp", {"company_name": "TechCorp"}),
+            (PromptType.JOB_ANALYSIS, "Analyze this job", None)
+        ]
+        
+        results = await self.claude_service.batch_analyze(jobs)
+        
+        assert [r.response_text for r in results] == ["first", "second"]
+        assert results[0].prompt_type == PromptType.COMPANY_RESEARCH
+        assert results[0].metadata["context"] == {"company_name": "TechCorp"}
+        assert results[1].usage_tokens == 15
+        requests = batches.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["job-0", "job-1"]
+        batches.retrieve.assert_awaited_once_with("batch-1")
+        assert self.claude_service.get_usage_stats()["requests_last_minute"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_request_raises(self):
+        """Test a failed request in the batch is reported"""
+        self.mock_batches([self.batch_entry("job-0", "ok"), self.batch_entry("job-1")])
+        jobs = [(PromptType.JOB_ANALYSIS, "one", None), (PromptType.JOB_ANALYSIS, "two", None)]
+        
+        with pytest.raises(ClaudeAPIError, match="job-1"):
+            await self.claude_service.batch_analyze(jobs)
+
+
+class TestStreaming:
+    """Test streamed requests and stall detection"""
+    
+    JOB_DESCRIPTION = "Software Engineer position requiring Python and React experience."
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+        self.claude_service.async_client = MagicMock()
+        self.claude_service.STREAM_STALL_TIMEOUT = 0.05
+    
+    @pytest.mark.asyncio
+    async def test_stream_analysis_shares_request_core(self):
+        """Test stream_analysis yields text and records total usage"""
+        final_message = MagicMock(usage=MagicMock(input_tokens=10, output_tokens=50))
+        self.claude_service.async_client.messages.stream = MagicMock(
+            return_value=mock_stream_manager(final_message, chunks=["a ", "b"])
+        )
+        
+        chunks = [chunk async for chunk in self.claude_service.stream_analysis("Prompt", PromptType.JOB_ANALYSIS)]
+        
+        assert chunks == ["a b"]
+        call_kwargs = self.claude_service.async_client.messages.stream.call_args[1]
+        assert call_kwargs["messages"] == [{"role": "user", "content": "Prompt"}]
+        assert call_kwargs["max_tokens"] == self.claude_service.MAX_TOKENS
+        assert self.claude_service.get_usage_stats()["tokens_last_minute"] == 60
+    
+    @pytest.mark.asyncio
+    async def test_stream_analysis_flushes_at_size_limit(self):
+        """Test buffered deltas are yielded once they reach the size limit"""
+        self.claude_service.STREAM_YIELD_MIN_CHARS = 4
+        self.claude_service.STREAM_YIELD_MAX_DELAY = 60
+        final_message = MagicMock(usage=MagicMock(input_tokens=1, output_tokens=1))
+        self.claude_service.async_client.messages.stream = MagicMock(
+            return_value=mock_stream_manager(final_message, chunks=["ab", "cd", "e", "f", "gh", "i"])
+        )
+        
+        chunks = [chunk async for chunk in self.claude_service.stream_analysis("Prompt", PromptType.JOB_ANALYSIS)]
+        
+        assert chunks == ["abcd", "efgh", "i"]
+    
+    @pytest.mark.asyncio
+    async def test_stream_analysis_flushes_after_delay_without_new_text(self):
+        """Test a buffered delta is yielded after the delay even if the stream pauses"""
+        self.claude_service.STREAM_YIELD_MAX_DELAY = 0.01
+        self.claude_service.STREAM_STALL_TIMEOUT = 1
+        resume = asyncio.Event()
+        
+        async def paused_text_stream():
+            yield "a"
+            await resume.wait()
+            yield "b"
+        
+        final_message = MagicMock(usage=MagicMock(input_tokens=1, output_tokens=1))
+        manager = mock_stream_manager(final_message)
+        manager.__aenter__.return_value.text_stream = paused_text_stream()
+        self.claude_service.async_client.messages.stream = MagicMock(return_value=manager)
+        
+        chunks = self.claude_service.stream_analysis("Prompt", PromptType.JOB_ANALYSIS)
+        first = await asyncio.wait_for(chunks.__anext__(), timeout=0.5)
+        resume.set()
+        rest = [chunk async for chunk in chunks]
+        
+        assert first == "a"
+        assert rest == ["b"]
+    
+    @pytest.mark.asyncio
+    async def test_stalled_text_stream_raises(self):
+        """Test a stream that stops producing text is aborted"""
+        async def stalled_text_stream():
+            yield '{"job_title": '
+            await asyncio.sleep(10)
+            yield '"Software Engineer"}'
+        
+        manager = mock_stream_manager(MagicMock())
+        manager.__aenter__.return_value.text_stream = stalled_text_stream()
+        self.claude_service.async_client.messages.stream = MagicMock(return_value=manager)
+        
+        with pytest.raises(ClaudeAPIError, match="Stream stalled"):
+            await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        manager.__aexit__.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_stalled_connection_raises(self):
+        """Test a request whose response headers never arrive is aborted"""
+        async def never_connects():
+            await asyncio.sleep(10)
+        
+        manager = MagicMock()
+        manager.__aenter__.side_effect = never_connects
+        self.claude_service.async_client.messages.stream = MagicMock(return_value=manager)
+        
+        with pytest.raises(ClaudeAPIError, match="Stream stalled"):
+            await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        manager.__aexit__.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_stalled_final_message_raises(self):
+        """Test waiting for the final message is covered by the stall timeout"""
+        async def never_finishes():
+            await asyncio.sleep(10)
+        
+        manager = mock_stream_manager(MagicMock(), chunks=["partial"])
+        manager.__aenter__.return_value.get_final_message = never_finishes
+        self.claude_service.async_client.messages.stream = MagicMock(return_value=manager)
+        
+        with pytest.raises(ClaudeAPIError, match="Stream stalled"):
+            await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+
+
+class TestErrorHandling:
+    """Test mapping of SDK errors to ClaudeAPIError"""
+    
+    JOB_DESCRIPTION = "Software Engineer position requiring Python and React experience."
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+        self.claude_service.async_client = MagicMock()
+    
+    @staticmethod
+    def status_error(error_class, status_code, headers=None):
+        """Build an SDK status error with a real HTTP response"""
+        request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+        response = httpx.Response(status_code, headers=headers, request=request)
+        return error_class("request failed", response=response, body=None)
+    
+    @pytest.mark.asyncio
+    async def test_invalid_inputs_rejected_before_request(self):
+        """Test argument validation runs for positional and keyword arguments"""
+        service = self.claude_service
+        
+        with pytest.raises(ClaudeAPIError, match="at least 50 characters"):
+            await service.analyze_job_description("Short job")
+        with pytest.raises(ClaudeAPIError, match="Company name is required"):
+            await service.research_company(company_name=None)
+        with pytest.raises(ClaudeAPIError, match="Job requirements are required"):
+            await service.analyze_resume("x" * 100, job_requirements="   ")
+        with pytest.raises(ClaudeAPIError, match="at least 100 characters"):
+            await service.analyze_resume(" " * 200, "Python")
+        with pytest.raises(ClaudeAPIError, match="at least 50 characters"):
+            await service.analyze_job_description("\n" + "x" * 40 + " " * 20)
+        
+        service.async_client.messages.stream.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_error_reports_retry_after(self):
+        """Test 429 responses are retried after retry-after, then reported as rate limits"""
+        self.claude_service.async_client.messages.stream = MagicMock(
+            side_effect=self.status_error(anthropic.RateLimitError, 429, {"retry-after": "12"})
+        )
+        
+        with patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            with pytest.raises(ClaudeAPIError, match=r"Rate limit exceeded.*retry after 12 seconds"):
+                await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        
+        assert self.claude_service.async_client.messages.stream.call_count == self.claude_service.MAX_ATTEMPTS
+        assert [call.args[0] for call in mock_sleep.await_args_list] == [12.0, 12.0]
+        assert self.claude_service.get_usage_stats()["requests_last_minute"] == self.claude_service.MAX_ATTEMPTS
+    
+    @pytest.mark.asyncio
+    async def test_transient_error_retried_with_backoff(self):
+        """Test a transient server error is retried and the later success returned"""
+        final_message = MagicMock(usage=MagicMock(input_tokens=10, output_tokens=20))
+        self.claude_service.async_client.messages.stream = MagicMock(side_effect=[
+            self.status_error(anthropic.InternalServerError, 503),
+            mock_stream_manager(final_message, chunks=["analysis"])
+        ])
+        
+        with patch('services.claude_service.asyncio.sleep', new_callable=AsyncMock) as mock_sleep, \
+             patch('services.claude_service.random.random', return_value=0.5):
+            result = await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        
+        assert result.response_text == "analysis"
+        mock_sleep.assert_awaited_once_with(1.5)
+    
+    @pytest.mark.asyncio
+    async def test_status_error_includes_status_code(self):
+        """Test non-transient HTTP errors are not retried and carry their status code"""
+        self.claude_service.async_client.messages.stream = MagicMock(
+            side_effect=self.status_error(anthropic.BadRequestError, 400)
+        )
+        
+        with pytest.raises(ClaudeAPIError, match="status 400"):
+            await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        assert self.claude_service.async_client.messages.stream.call_count == 1
+
+
+class TestResultCache:
+    """Test the in-process result cache"""
+    
+    JOB_DESCRIPTION = "Software Engineer position requiring Python and React experience."
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+        final_message = MagicMock(usage=MagicMock(input_tokens=10, output_tokens=20))
+        self.claude_service.async_client = MagicMock()
+        self.claude_service.async_client.messages.stream = MagicMock(
+            side_effect=lambda **kwargs: mock_stream_manager(final_message, chunks=["analysis"])
+        )
+    
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_served_from_cache(self):
+        """Test an identical request does not call the API again"""
+        first = await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        second = await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        
+        assert self.claude_service.async_client.messages.stream.call_count == 1
+        assert second.response_text == first.response_text == "analysis"
+        assert second.processing_time == 0.0
+        assert second.metadata["cached"] is True
+        assert "cached" not in first.metadata
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        """Test identical requests in flight at the same time make one API call"""
+        first, second = await asyncio.gather(
+            self.claude_service.analyze_job_description(self.JOB_DESCRIPTION),
+            self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        )
+        
+        assert self.claude_service.async_client.messages.stream.call_count == 1
+        assert first.response_text == second.response_text == "analysis"
+        assert second.metadata["coalesced"] is True
+        assert self.claude_service._inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_requests_share_failure(self):
+        """Test a failed shared call raises for every waiting caller"""
+        async def fail_after_yield(*args):
+            await asyncio.sleep(0)
+            raise anthropic.APIError("boom", httpx.Request("POST", "https://api.anthropic.com/v1/messages"), body=None)
+        
+        manager = MagicMock()
+        manager.__aenter__ = AsyncMock(side_effect=fail_after_yield)
+        self.claude_service.async_client.messages.stream = MagicMock(return_value=manager)
+        
+        results = await asyncio.gather(
+            self.claude_service.analyze_job_description(self.JOB_DESCRIPTION),
+            self.claude_service.analyze_job_description(self.JOB_DESCRIPTION),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(result, ClaudeAPIError) for result in results)
+        assert self.claude_service.async_client.messages.stream.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_request_survives_owner_cancellation(self):
+        """Test a waiting caller sends its own request when the owner is cancelled"""
+        original_stream_message = self.claude_service._stream_message
+        calls = []
+        
+        async def stream_message(prompt, model):
+            calls.append(prompt)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+            return await original_stream_message(prompt, model)
+        
+        self.claude_service._stream_message = stream_message
+        
+        owner = asyncio.create_task(self.claude_service.analyze_job_description(self.JOB_DESCRIPTION))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self.claude_service.analyze_job_description(self.JOB_DESCRIPTION))
+        await asyncio.sleep(0)
+        owner.cancel()
+        
+        result = await asyncio.wait_for(waiter, timeout=1)
+        
+        assert owner.cancelled()
+        assert result.response_text == "analysis"
+        assert len(calls) == 2
+        assert self.claude_service._inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded_and_skips_cover_letters(self):
+        """Test old entries are evicted and cover letters are always regenerated"""
+        self.claude_service.RESULT_CACHE_SIZE = 1
+        
+        await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION + " Remote.")
+        await self.claude_service.analyze_job_description(self.JOB_DESCRIPTION)
+        assert self.claude_service.async_client.messages.stream.call_count == 3
+        assert len(self.claude_service._result_cache) == 1
+        
+        for _ in range(2):
+            await self.claude_service.generate_cover_letter("Job", "Company", "Resume")
+        assert self.claude_service.async_client.messages.stream.call_count == 5
+
+
+class TestApplicationAnalysis:
+    """Test the combined application pipeline"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+    
+    @pytest.mark.asyncio
+    async def test_independent_analyses_run_concurrently(self):
+        """Test job, company and resume analyses overlap before the cover letter"""
+        started = []
+        all_started = asyncio.Event()
+        
+        def analysis(name):
+            async def run(*args, **kwargs):
+                started.append(name)
+                if len(started) == 3:
+                    all_started.set()
+                await asyncio.wait_for(all_started.wait(), timeout=1)
+                return MagicMock(response_text=f"{name} result")
+            return run
+        
+        service = self.claude_service
+        service.analyze_job_description = analysis("job")
+        service.research_company = analysis("company")
+        service.analyze_resume = analysis("resume")
+        service.generate_cover_letter = AsyncMock(return_value=MagicMock(response_text="letter"))
+        
+        results = await service.analyze_application("Job text", "TechCorp", "Resume text", tone="friendly")
+        
+        assert sorted(started) == ["company", "job", "resume"]
+        assert results["cover_letter"].response_text == "letter"
+        assert results["resume_analysis"].response_text == "resume result"
+        service.generate_cover_letter.assert_awaited_once_with(
+            job_description="Job text",
+            company_info="company result",
+            resume_summary="resume result",
+            tone="friendly",
+            focus_areas=None
+        )
+
+
+class TestBulkResumeAnalysis:
+    """Test screening several resumes per request"""
+    
+    RESUME = "Experienced Python developer with React, SQL and AWS background. " * 3
+    
+    def setup_method(self):
+        """Setup test environment"""
+        with patch('services.claude_service.get_config'):
+            self.claude_service = ClaudeService()
+        self.claude_service.async_client = MagicMock()
+    
+    def stream_returning(self, *texts):
+        """Wire successive requests to answer with the given texts"""
+        final_message = MagicMock(usage=MagicMock(input_tokens=60, output_tokens=30))
+        self.claude_service.async_client.messages.stream = MagicMock(side_effect=[
+            mock_stream_manager(final_message, chunks=[text]) for text in texts
+        ])
+    
+    @pytest.mark.asyncio
+    async def test_resumes_grouped_into_shared_requests(self):
+        """Test resumes are packed into one prompt per group and mapped back in order"""
+        self.claude_service.BULK_TOKENS_PER_RESUME = self.claude_service.MAX_TOKENS // 2
+        self.stream_returning(
+            '```json\n[{"index": 1, "score": 6}, {"index": 0, "score": 8}]\n```',
+            '{"score": 5}'
+        )
+        resumes = [self.RESUME + "A", self.RESUME + "B", self.RESUME + "C"]
+        
+        results = await self.claude_service.analyze_resumes_bulk(resumes, "Python, React")
+        
+        assert self.claude_service.async_client.messages.stream.call_count == 2
+        first_prompt = self.claude_service.async_client.messages.stream.call_args_list[0][1]["messages"][0]["content"]
+        assert '<resume index="1">' in first_prompt and resumes[1] in first_prompt
+        assert [json.loads(r.response_text)["score"] for r in results[:2]] == [8, 6]
+        assert results[0].usage_tokens == 45
+        assert results[1].metadata["context"]["bulk_index"] == 1
+        assert results[2].response_text == '{"score": 5}'
+    
+    @pytest.mark.asyncio
+    async def test_mismatched_response_raises(self):
+        """Test a response with the wrong number of analyses is rejected"""
+        self.stream_returning('[{"index": 0}]')
+        
+        with pytest.raises(ClaudeAPIError, match="Expected 2 resume analyses"):
+            await self.claude_service.analyze_resumes_bulk([self.RESUME, self.RESUME + "x"], "Python")
+
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("response", [
+        '[{"index": 0}, {"index": 0}]',
+        '[{"index": 0}, {"index": 2}]',
+        '[{"index": 0}, {"index": "1"}]',
+        '[{"index": 0}, {"score": 5}]'
+    ])
+    async def test_bad_indices_raise(self, response):
+        """Test duplicated, missing or malformed indices are rejected"""
+        self.stream_returning(response)
+        
+        with pytest.raises(ClaudeAPIError, match="expected indices 0 to 1"):
+            await self.claude_service.analyze_resumes_bulk([self.RESUME, self.RESUME + "x"], "Python")
+    
+    @pytest.mark.asyncio
+    async def test_short_resume_rejected_before_request(self):
+        """Test every resume is validated before any request is sent"""
+        self.stream_returning('[]')
+        
+        with pytest.raises(ClaudeAPIError, match="at least 100 characters"):
+            await self.claude_service.analyze_resumes_bulk([self.RESUME, "too short"], "Python")
+        assert not self.claude_service.async_client.messages.stream.called
+
+
+class TestAnalysisResult:
+    """Test decoding of JSON responses"""
+    
+    def make_result(self, text):
+        return AnalysisResult(
+            prompt_type=PromptType.JOB_ANALYSIS,
+            response_text=text,
+            usage_tokens=0,
+            processing_time=0.0,
+            metadata={}
+        )
+    
+    def test_parsed_strips_code_fence(self):
+        """Test a fenced JSON response is decoded"""
+        result = self.make_result('```json\n{"job_title": "Engineer"}\n```')
+        
+        assert result.parsed == {"job_title": "Engineer"}
+        assert result.response_text.startswith("```json")
+    
+    def test_parsed_is_cached(self):
+        """Test the response is decoded only once"""
+        result = self.make_result('{"skills": ["Python"]}')
+        
+        assert result.parsed is result.parsed
+    
+    def test_parsed_invalid_json(self):
+        """Test a non-JSON response raises the stdlib decode error"""
+        result = self.make_result("Not JSON")
+        
+        with pytest.raises(json.JSONDecodeError):
+            result.parsed
+
+
+class TestServiceLifecycle:
+    """Test the process-wide service instance"""
+    
+    @pytest.mark.asyncio
+    async def test_close_releases_singleton(self):
+        """Test shutdown closes the shared client and the next call builds a new service"""
+        await close_claude_service()
+        with patch('services.claude_service.get_config'):
+            service = get_claude_service()
+            assert get_claude_service() is service
+            service.async_client = MagicMock(close=AsyncMock())
+            
+            await close_claude_service()
+            
+            service.async_client.close.assert_awaited_once()
+            assert get_claude_service() is not service
+        
+        await close_claude_service()
+        await close_claude_service()
+    
+    def test_concurrent_first_access_builds_one_service(self):
+        """Test threads racing on first access share a single instance"""
+        _create_claude_service.cache_clear()
+        created = []
+        
+        def slow_init(service):
+            created.append(service)
+            time.sleep(0.05)
+        
+        try:
+            with patch.object(ClaudeService, '__init__', slow_init):
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    services = list(pool.map(lambda _: get_claude_service(), range(4)))
+        finally:
+            _create_claude_service.cache_clear()
+        
+        assert len(created) == 1
+        assert all(service is created[0] for service in services)
+
+
 class TestIntegration:
     """Integration tests for Claude service"""
     
@@ -308,7 +1013,6 @@ class TestIntegration:
     async def test_full_analysis_workflow(self):
         """Test complete analysis workflow"""
         with patch('services.claude_service.get_config'), \
-             patch('services.claude_service.Anthropic'), \
              patch('services.claude_service.AsyncAnthropic') as mock_async:
             
             # Setup mock client
@@ -333,14 +1037,14 @@ class TestIntegration:
             
             # Configure mock to return different responses
             call_count = 0
-            async def mock_create(*args, **kwargs):
+            def mock_stream(*args, **kwargs):
                 nonlocal call_count
                 responses = ['job', 'company', 'resume']
                 response = mock_responses[responses[call_count]]
                 call_count += 1
-                return response
+                return mock_stream_manager(response)
             
-            mock_client.messages.create = AsyncMock(side_effect=mock_create)
+            mock_client.messages.stream = MagicMock(side_effect=mock_stream)
             
             # Create service
             service = ClaudeService()
@@ -370,7 +1074,6 @@ if __name__ == "__main__":
     try:
         # Mock configuration for standalone tests
         with patch('services.claude_service.get_config') as mock_config, \
-             patch('services.claude_service.Anthropic'), \
              patch('services.claude_service.AsyncAnthropic'):
             
             mock_claude_config = MagicMock()
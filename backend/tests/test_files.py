@@ -3,8 +3,11 @@ Tests for file upload service and endpoints.
 """
 
 import pytest
+import hashlib
 import tempfile
 import os
+from datetime import datetime, timezone
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -16,6 +19,7 @@ with patch('services.file_service.get_config') as mock_config:
     
     from services.file_service import (
         FileService,
+        FileInfo,
         FileValidationError,
         FileProcessingError,
         get_file_service
@@ -239,6 +243,25 @@ class TestFileUploadEndpoints:
         assert 'txt' in result['supported_formats']
         assert 'limitations' in result
         assert 'security_features' in result
+    
+    def test_upload_reads_at_most_limit(self):
+        """Test an oversized upload is read only up to one byte past the limit"""
+        from fastapi import HTTPException, UploadFile
+        from api.files import upload_resume
+        import asyncio
+        
+        file_service = make_file_service()
+        file_service.MAX_FILE_SIZE = 1024
+        upload = UploadFile(file=BytesIO(b"x" * 4096), filename="resume.txt")
+        
+        with patch('api.files.get_file_service', return_value=file_service), \
+             patch.object(upload, 'read', wraps=upload.read) as mock_read:
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(upload_resume(file=upload, extract_immediately=False, session=MagicMock()))
+        
+        assert exc_info.value.status_code == 400
+        assert "File size exceeds limit" in exc_info.value.detail
+        mock_read.assert_called_once_with(1025)
 
 
 class TestFileValidation:
@@ -298,6 +321,426 @@ class TestFileCleanup:
         assert not test_file.exists()
 
 
+
+def make_file_service():
+    """Build a FileService without a configuration file"""
+    with patch('services.file_service.get_config') as mock_config:
+        mock_config.return_value.security.max_file_size = 10 * 1024 * 1024
+        return FileService()
+
+
+def make_pdf(*page_texts):
+    """Build a PDF with one page per text"""
+    pymupdf = pytest.importorskip("pymupdf")
+    doc = pymupdf.open()
+    for text in page_texts:
+        doc.new_page().insert_text((72, 72), text)
+    doc.set_metadata({"title": "Resume", "author": "Jane Doe"})
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+class TestFileStorage:
+    """Test saving uploads"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+    
+    def test_save_file_hashes_in_chunks(self):
+        """Test a multi-chunk upload is written intact with its SHA-256"""
+        self.file_service.WRITE_CHUNK_SIZE = 16
+        content = b"Experienced engineer with Python and React skills.\n" * 5
+        
+        file_info = self.file_service.save_file(content, "resume.txt", "text/plain")
+        
+        try:
+            assert file_info.temp_path.read_bytes() == content
+            assert file_info.file_hash == hashlib.sha256(content).hexdigest()
+        finally:
+            self.file_service.cleanup_file(file_info)    
+    def test_sanitize_filename(self):
+        """Test unsafe characters are replaced and long names keep their extension"""
+        assert self.file_service._sanitize_filename("../cv<1>:\"a|b?*.pdf") == "cv_1___a_b__.pdf"
+        assert self.file_service._sanitize_filename("x" * 120 + ".docx") == "x" * 90 + ".docx"
+    
+    def test_cleanup_old_files(self, tmp_path):
+        """Test only stored uploads older than the cutoff are removed"""
+        self.file_service.temp_dir = tmp_path
+        old_time = datetime.now().timestamp() - 25 * 3600
+        old_upload = tmp_path / "file_old_resume.txt"
+        new_upload = tmp_path / "file_new_resume.txt"
+        other_file = tmp_path / "notes.txt"
+        for path in (old_upload, new_upload, other_file):
+            path.write_text("test content")
+        for path in (old_upload, other_file):
+            os.utime(path, (old_time, old_time))
+        (tmp_path / "file_dir").mkdir()
+        (tmp_path / "file_link").symlink_to(old_upload)
+        
+        assert self.file_service.cleanup_old_files(max_age_hours=24) == 1
+        
+        assert not old_upload.exists()
+        assert new_upload.exists()
+        assert other_file.exists()
+        assert (tmp_path / "file_dir").is_dir()
+    
+    def test_unsupported_format_not_extracted(self, tmp_path):
+        """Test extract_text rejects formats without an extractor"""
+        path = tmp_path / "resume.rtf"
+        path.write_text("{\\rtf1 Resume}")
+        file_info = FileInfo(
+            file_id="file_test",
+            original_filename="resume.rtf",
+            file_size=path.stat().st_size,
+            content_type="application/rtf",
+            file_format="rtf",
+            upload_timestamp=datetime.now(timezone.utc),
+            file_hash="",
+            temp_path=path
+        )
+        
+        with pytest.raises(FileProcessingError, match="Unsupported format: rtf"):
+            self.file_service.extract_text(file_info)
+    
+    def test_extract_text_file(self, tmp_path):
+        """Test text files are decoded from a memory map, including empty files"""
+        self.file_service.ENCODING_SNIFF_BYTES = 64
+        content = "Experienced engineer with Python skills. " * 10 + "Résumé"
+        
+        def text_file_info(name, data):
+            path = tmp_path / name
+            path.write_bytes(data)
+            return FileInfo(
+                file_id="file_test",
+                original_filename=name,
+                file_size=len(data),
+                content_type="text/plain",
+                file_format="txt",
+                upload_timestamp=datetime.now(timezone.utc),
+                file_hash="",
+                temp_path=path
+            )
+        
+        extracted = self.file_service.extract_text(text_file_info("resume.txt", content.encode("utf-8")))
+        assert extracted.text == content
+        assert extracted.metadata['line_count'] == 1
+        
+        empty = self.file_service.extract_text(text_file_info("empty.txt", b""))
+        assert empty.text == ""
+        assert empty.word_count == 0
+    
+    def test_saved_file_is_owner_only(self):
+        """Test uploads are created with mode 0600 rather than chmod-ed afterwards"""
+        content = b"Experienced engineer with Python and React skills."
+        
+        with patch('pathlib.Path.chmod') as mock_chmod:
+            file_info = self.file_service.save_file(content, "resume.txt", "text/plain")
+        
+        try:
+            assert file_info.temp_path.stat().st_mode & 0o777 == 0o600
+            mock_chmod.assert_not_called()
+        finally:
+            self.file_service.cleanup_file(file_info)
+    
+    def test_existing_path_is_not_overwritten(self, tmp_path):
+        """Test a file already at the target path is neither written nor removed"""
+        self.file_service.temp_dir = tmp_path
+        existing = tmp_path / "file_fixed_resume.txt"
+        existing.write_bytes(b"original")
+        content = b"Experienced engineer with Python and React skills."
+        
+        with patch('services.file_service.secrets.token_urlsafe', return_value="fixed"):
+            with pytest.raises(FileProcessingError, match="Failed to save file"):
+                self.file_service.save_file(content, "resume.txt", "text/plain")
+        
+        assert existing.read_bytes() == b"original"
+    
+    def test_extracted_content_is_cached(self):
+        """Test extract_text parses a file once and cleanup drops the cached content"""
+        content = b"Experienced engineer with Python and React skills."
+        file_info = self.file_service.save_file(content, "resume.txt", "text/plain")
+        
+        try:
+            with patch.object(self.file_service, '_extract_text_content',
+                              wraps=self.file_service._extract_text_content) as mock_extract:
+                first = self.file_service.extract_text(file_info)
+                self.file_service.parse_resume(file_info)
+                assert self.file_service.extract_text(file_info) is first
+            
+            mock_extract.assert_called_once_with(file_info)
+        finally:
+            self.file_service.cleanup_file(file_info)
+        
+        assert file_info.extracted is None
+        with pytest.raises(FileProcessingError, match="already deleted"):
+            self.file_service.extract_text(file_info)
+    
+    def test_async_wrappers_run_in_worker_thread(self):
+        """Test saving and extraction run off the event loop thread"""
+        import asyncio
+        import threading
+        
+        content = b"Experienced engineer with Python and React skills."
+        threads = []
+        
+        def record_thread(method):
+            def wrapper(*args, **kwargs):
+                threads.append(threading.current_thread())
+                return method(*args, **kwargs)
+            return wrapper
+        
+        async def upload():
+            file_info = await self.file_service.save_file_async(content, "resume.txt", "text/plain")
+            extracted = await self.file_service.extract_text_async(file_info)
+            return file_info, extracted
+        
+        with patch.object(self.file_service, 'save_file', record_thread(self.file_service.save_file)), \
+             patch.object(self.file_service, 'extract_text', record_thread(self.file_service.extract_text)):
+            file_info, extracted = asyncio.run(upload())
+        
+        try:
+            assert extracted.text == content.decode()
+            assert len(threads) == 2
+            assert threading.main_thread() not in threads
+        finally:
+            self.file_service.cleanup_file(file_info)
+
+
+class TestSecurityScan:
+    """Test the dangerous content scan"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+    
+    def test_patterns_match_case_insensitively(self):
+        """Test mixed-case patterns are detected and reported in lowercase"""
+        with pytest.raises(FileValidationError, match="Suspicious content detected: <script"):
+            self.file_service._security_scan(b"Resume <ScRiPt>alert(1)</script>", "txt")
+        with pytest.raises(FileValidationError, match="Suspicious content detected: onerror="):
+            self.file_service._security_scan(b"<img ONERROR=x>", "txt")
+        
+        self.file_service._security_scan(b"Experienced engineer, Python and React", "txt")
+    
+    def test_format_specific_threats(self):
+        """Test PDF JavaScript and DOCX macro checks only apply to their format"""
+        with pytest.raises(FileValidationError, match="PDF contains JavaScript"):
+            self.file_service._security_scan(b"<< /S /JavaScript /JS (app.alert(1)) >>", "pdf")
+        with pytest.raises(FileValidationError, match="macros are not allowed"):
+            self.file_service._security_scan(b"word/vbaProject.bin", "docx")
+        with pytest.raises(FileValidationError, match="macros are not allowed"):
+            self.file_service._security_scan(b"MACROS", "docx")
+        
+        self.file_service._security_scan(b"word/vbaproject.bin", "docx")
+        self.file_service._security_scan(b"/JS", "txt")
+
+
+class TestTypeDetection:
+    """Test file type and encoding detection"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+        self.file_service.ENCODING_SNIFF_BYTES = 64
+    
+    def test_magic_only_reads_prefix(self):
+        """Test libmagic is given at most MAGIC_SNIFF_BYTES"""
+        content = b"Experienced engineer with Python and React skills.\n" * 2000
+        
+        with patch('services.file_service.MAGIC_AVAILABLE', True), \
+             patch('services.file_service.magic', create=True) as mock_magic:
+            mock_magic.from_buffer.return_value = "text/plain"
+            assert self.file_service.validate_file(content, "resume.txt", "text/plain") == "txt"
+        
+        sniffed = mock_magic.from_buffer.call_args[0][0]
+        assert sniffed == content[:self.file_service.MAGIC_SNIFF_BYTES]
+    
+    def test_mime_types_map_to_formats(self):
+        """Test every supported MIME type resolves to its format"""
+        for fmt, mime_types in FileService.SUPPORTED_FORMATS.items():
+            for mime_type in mime_types:
+                assert FileService._MIME_TO_FORMAT[mime_type] == fmt
+        
+        with patch('services.file_service.MAGIC_AVAILABLE', True), \
+             patch('services.file_service.magic', create=True) as mock_magic:
+            mock_magic.from_buffer.return_value = "application/zip"
+            with pytest.raises(FileValidationError, match="Unsupported file type: application/zip"):
+                self.file_service.validate_file(b"PK\x03\x04 resume", "resume.docx", "application/zip")
+    
+    def test_utf8_skips_detection(self):
+        """Test UTF-8 text is accepted without running chardet"""
+        content = "Expérience professionnelle à Paris, développeur Python. ".encode("utf-8") * 10
+        
+        with patch('services.file_service.chardet.detect') as mock_detect:
+            self.file_service._validate_text(content)
+        
+        mock_detect.assert_not_called()
+    
+    def test_encoding_detected_from_prefix(self):
+        """Test chardet only sees the prefix when the whole text decodes with its answer"""
+        content = "Expérience professionnelle à Paris, développeur Python. ".encode("latin-1") * 10
+        
+        with patch('services.file_service.chardet.detect',
+                   return_value={'encoding': 'latin-1', 'confidence': 0.9}) as mock_detect:
+            self.file_service._validate_text(content)
+        
+        mock_detect.assert_called_once_with(content[:64])
+    
+    def test_late_non_ascii_redetected(self):
+        """Test text whose prefix is plain ASCII is re-detected in full"""
+        content = ("Experienced engineer with Python skills. " * 10 + "Résumé").encode("latin-1")
+        results = [{'encoding': 'ascii', 'confidence': 1.0}, {'encoding': 'latin-1', 'confidence': 0.9}]
+        
+        with patch('services.file_service.chardet.detect', side_effect=results) as mock_detect:
+            self.file_service._validate_text(content)
+        
+        assert mock_detect.call_args_list[-1][0][0] == content
+
+
+class TestSectionDetection:
+    """Test resume section header detection"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+    
+    def test_headers_match_at_start_or_end(self):
+        """Test headers are recognised by a leading or trailing keyword"""
+        text = "Jane Doe\nMy Technical Skills\nPython\nProjects I built:\nPersonal website\nWeb development career history\nNot a header"
+        
+        sections = self.file_service._detect_resume_sections(text)
+        
+        assert sections == {
+            'header': "Jane Doe",
+            'skills': "Python",
+            'projects': "Personal website\nWeb development career history\nNot a header"
+        }
+    
+    def test_header_precedence(self):
+        """Test a line matching two sections goes to the earlier one"""
+        sections = self.file_service._detect_resume_sections("Education and Experience\nTech Corp")
+        
+        assert sections == {'experience': "Tech Corp"}
+    
+    def test_long_lines_are_not_headers(self):
+        """Test lines of 100 characters or more are kept as content"""
+        line = "Experience " + "x" * 100
+        
+        assert self.file_service._detect_resume_sections(line) == {'header': line}
+
+
+class TestPdfProcessing:
+    """Test PDF validation and extraction"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+    
+    def test_validate_pdf(self):
+        """Test a readable PDF passes validation"""
+        self.file_service._validate_pdf(make_pdf("EXPERIENCE", "Senior Developer at Tech Corp"))
+    
+    def test_validate_pdf_page_limit(self):
+        """Test PDFs over the page limit are rejected"""
+        with pytest.raises(FileValidationError, match="maximum page limit"):
+            self.file_service._validate_pdf(make_pdf(*["page"] * 51))
+    
+    def test_invalid_pdf_rejected(self):
+        """Test content PyMuPDF rejects still fails validation through PyPDF2"""
+        with pytest.raises(FileValidationError, match="PDF validation failed"):
+            self.file_service._validate_pdf(b"Not a real PDF file content")
+    
+    def test_validate_pdf_without_pymupdf(self):
+        """Test the PyPDF2 fallback validates from memory"""
+        with patch('services.file_service.PYMUPDF_AVAILABLE', False), \
+             patch('services.file_service.tempfile.NamedTemporaryFile') as mock_temp:
+            self.file_service._validate_pdf(make_pdf("EXPERIENCE"))
+            with pytest.raises(FileValidationError, match="PDF validation failed"):
+                self.file_service._validate_pdf(b"Not a real PDF file content")
+        
+        mock_temp.assert_not_called()
+    
+    def test_extract_pdf_text(self, tmp_path):
+        """Test text and metadata are extracted from every page"""
+        pdf_path = tmp_path / "resume.pdf"
+        pdf_path.write_bytes(make_pdf("EXPERIENCE", "Senior Developer at Tech Corp"))
+        file_info = FileInfo(
+            file_id="file_test",
+            original_filename="resume.pdf",
+            file_size=pdf_path.stat().st_size,
+            content_type="application/pdf",
+            file_format="pdf",
+            upload_timestamp=datetime.now(timezone.utc),
+            file_hash="",
+            temp_path=pdf_path
+        )
+        
+        extracted = self.file_service.extract_text(file_info)
+        
+        assert extracted.extraction_method == "PyMuPDF"
+        assert extracted.metadata['page_count'] == 2
+        assert extracted.metadata['pdf_info']['author'] == "Jane Doe"
+        assert "Tech Corp" in extracted.sections['experience']
+        assert extracted.word_count == 6
+
+
+class TestDocxProcessing:
+    """Test DOCX validation and extraction"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.file_service = make_file_service()
+    
+    def test_validate_docx(self):
+        """Test a DOCX document is validated from memory"""
+        from docx import Document
+        
+        doc = Document()
+        doc.add_paragraph("EXPERIENCE")
+        buffer = BytesIO()
+        doc.save(buffer)
+        
+        with patch('services.file_service.tempfile.NamedTemporaryFile') as mock_temp:
+            self.file_service._validate_docx(buffer.getvalue())
+            with pytest.raises(FileValidationError, match="DOCX validation failed"):
+                self.file_service._validate_docx(b"Not a real DOCX file content")
+        
+        mock_temp.assert_not_called()
+    
+    def test_extract_docx_text(self, tmp_path):
+        """Test paragraphs and non-empty table cells are extracted in order"""
+        from docx import Document
+        
+        doc = Document()
+        doc.add_paragraph("SKILLS")
+        doc.add_paragraph("   ")
+        doc.add_paragraph("Python")
+        table = doc.add_table(rows=1, cols=3)
+        table.rows[0].cells[0].text = " React "
+        table.rows[0].cells[2].text = "Node.js"
+        docx_path = tmp_path / "resume.docx"
+        doc.save(docx_path)
+        file_info = FileInfo(
+            file_id="file_test",
+            original_filename="resume.docx",
+            file_size=docx_path.stat().st_size,
+            content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            file_format="docx",
+            upload_timestamp=datetime.now(timezone.utc),
+            file_hash="",
+            temp_path=docx_path
+        )
+        
+        extracted = self.file_service.extract_text(file_info)
+        
+        assert extracted.text == "SKILLS\nPython\nReact | Node.js"
+        assert extracted.metadata['paragraph_count'] == 3
+        assert extracted.metadata['table_count'] == 1
+        assert extracted.sections == {'skills': "Python\nReact | Node.js"}
+
+
 if __name__ == "__main__":
     # Simple test runner for development
     import sys
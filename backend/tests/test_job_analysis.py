@@ -5,7 +5,9 @@ Tests for job analysis orchestration service.
 import pytest
 import asyncio
 import json
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
+from dataclasses import asdict, FrozenInstanceError
 from datetime import datetime, timezone, timedelta
 
 # Mock dependencies before importing
@@ -22,9 +24,22 @@ with patch('services.job_analysis_service.get_file_service'), \
         JobAnalysisError,
         get_job_analysis_service
     )
+    from services.claude_service import ClaudeAPIError, PromptType, AnalysisResult as ClaudeResult
+    from utils.parsers import ParsedResume, ContactInfo, WorkExperience, Education, Project
     from services.auth_service import SessionData
 
 
+def make_claude_response(text, processing_time=2.0):
+    """Build a Claude service result with the given response text"""
+    return ClaudeResult(
+        prompt_type=PromptType.JOB_ANALYSIS,
+        response_text=text,
+        usage_tokens=150,
+        processing_time=processing_time,
+        metadata={}
+    )
+
+
 class TestJobAnalysisService:
     """Test job analysis orchestration service"""
     
@@ -36,16 +51,13 @@ class TestJobAnalysisService:
         self.mock_resume_parser = MagicMock()
         
         # Configure mock Claude service responses
-        mock_claude_response = MagicMock()
-        mock_claude_response.response_text = '{"job_title": "Software Engineer", "requirements": ["Python", "React"]}'
-        mock_claude_response.usage_tokens = 150
-        mock_claude_response.processing_time = 2.5
+        response_text = '{"job_title": "Software Engineer", "requirements": ["Python", "React"]}'
         
-        self.mock_claude_service.analyze_job_description = AsyncMock(return_value=mock_claude_response)
-        self.mock_claude_service.research_company = AsyncMock(return_value=mock_claude_response)
-        self.mock_claude_service.analyze_resume = AsyncMock(return_value=mock_claude_response)
-        self.mock_claude_service.generate_cover_letter = AsyncMock(return_value=mock_claude_response)
-        self.mock_claude_service.analyze_skills_gap = AsyncMock(return_value=mock_claude_response)
+        self.mock_claude_service.analyze_job_description = AsyncMock(return_value=make_claude_response(response_text, 2.5))
+        self.mock_claude_service.research_company = AsyncMock(return_value=make_claude_response(response_text, 2.5))
+        self.mock_claude_service.analyze_resume = AsyncMock(return_value=make_claude_response(response_text, 2.5))
+        self.mock_claude_service.generate_cover_letter = AsyncMock(return_value=make_claude_response(response_text, 2.5))
+        self.mock_claude_service.analyze_skills_gap = AsyncMock(return_value=make_claude_response(response_text, 2.5))
         
         # Mock resume parser
         mock_parsed_resume = MagicMock()
@@ -141,10 +153,10 @@ class TestJobAnalysisService:
         assert job["status"] == AnalysisStatus.PENDING
         
         # Check progress initialization
-        progress_list = self.service.job_progress[analysis_id]
-        assert len(progress_list) == 7
+        progress_by_step = self.service.job_progress[analysis_id]
+        assert list(progress_by_step) == list(AnalysisStep)
         
-        for progress in progress_list:
+        for progress in progress_by_step.values():
             assert progress.status == AnalysisStatus.PENDING
             assert progress.step_number >= 1 and progress.step_number <= 7
     
@@ -175,6 +187,22 @@ class TestJobAnalysisService:
                 job_description="Software Engineer position requiring Python and React experience for building web applications."
             )
     
+    def test_dataclass_defaults_are_independent(self):
+        """Each request and progress entry gets its own mutable defaults"""
+        first = AnalysisRequest(session_id="s1", user_id="u1", job_description="First job")
+        second = AnalysisRequest(session_id="s2", user_id="u2", job_description="Second job")
+        first.preferences["tone"] = "formal"
+        
+        assert second.preferences == {}
+        progress = AnalysisProgress(
+            step=AnalysisStep.JOB_ANALYSIS,
+            step_number=1,
+            step_name="Job Description Analysis",
+            status=AnalysisStatus.PENDING,
+            progress_percentage=14
+        )
+        assert progress.details == {}
+    
     def test_progress_tracking(self):
         """Test progress tracking functionality"""
         # Create a mock analysis job
@@ -186,7 +214,7 @@ class TestJobAnalysisService:
         }
         
         # Initialize progress
-        self.service.job_progress[analysis_id] = []
+        self.service.job_progress[analysis_id] = {}
         for step in AnalysisStep:
             config = self.service.STEP_CONFIG[step]
             progress = AnalysisProgress(
@@ -196,7 +224,7 @@ class TestJobAnalysisService:
                 status=AnalysisStatus.PENDING,
                 progress_percentage=config["progress_percentage"]
             )
-            self.service.job_progress[analysis_id].append(progress)
+            self.service.job_progress[analysis_id][step] = progress
         
         # Test getting progress
         progress_data = self.service.get_progress(analysis_id)
@@ -258,15 +286,15 @@ class TestJobAnalysisService:
         }
         
         # Initialize progress with one processing step
-        self.service.job_progress[analysis_id] = [
-            AnalysisProgress(
+        self.service.job_progress[analysis_id] = {
+            AnalysisStep.JOB_ANALYSIS: AnalysisProgress(
                 step=AnalysisStep.JOB_ANALYSIS,
                 step_number=1,
                 step_name="Job Analysis",
                 status=AnalysisStatus.PROCESSING,
                 progress_percentage=14
             )
-        ]
+        }
         
         # Test cancellation
         result = self.service.cancel_analysis(analysis_id)
@@ -277,7 +305,7 @@ class TestJobAnalysisService:
         assert job["status"] == AnalysisStatus.CANCELLED
         
         # Check step status updated
-        progress = self.service.job_progress[analysis_id][0]
+        progress = self.service.job_progress[analysis_id][AnalysisStep.JOB_ANALYSIS]
         assert progress.status == AnalysisStatus.CANCELLED
         
         # Test cancelling non-existent job
@@ -300,7 +328,7 @@ class TestJobAnalysisService:
             "started_at": old_time,
             "updated_at": old_time
         }
-        self.service.job_progress[analysis_id] = []
+        self.service.job_progress[analysis_id] = {}
         self.service.job_results[analysis_id] = MagicMock()
         
         # Create recent job
@@ -336,30 +364,23 @@ class TestAnalysisWorkflow:
         self.mock_resume_parser = MagicMock()
         
         # Configure successful Claude responses
-        def create_claude_response(text):
-            response = MagicMock()
-            response.response_text = text
-            response.usage_tokens = 150
-            response.processing_time = 2.0
-            return response
-        
-        self.mock_claude_service.analyze_job_description.return_value = create_claude_response(
+        self.mock_claude_service.analyze_job_description.return_value = make_claude_response(
             '{"job_title": "Senior Software Engineer", "company_name": "TechCorp", "requirements": ["Python", "React", "5+ years experience"]}'
         )
         
-        self.mock_claude_service.research_company.return_value = create_claude_response(
+        self.mock_claude_service.research_company.return_value = make_claude_response(
             '{"company_name": "TechCorp", "industry": "Technology", "culture_insights": ["Innovation-focused", "Remote-friendly"]}'
         )
         
-        self.mock_claude_service.analyze_skills_gap.return_value = create_claude_response(
+        self.mock_claude_service.analyze_skills_gap.return_value = make_claude_response(
             '{"missing_skills": ["React", "AWS"], "recommendations": ["Learn React fundamentals", "Get AWS certification"]}'
         )
         
-        self.mock_claude_service.analyze_resume.return_value = create_claude_response(
+        self.mock_claude_service.analyze_resume.return_value = make_claude_response(
             '{"overall_score": 8.5, "recommendations": ["Add more quantified achievements", "Include React projects"]}'
         )
         
-        self.mock_claude_service.generate_cover_letter.return_value = create_claude_response(
+        self.mock_claude_service.generate_cover_letter.return_value = make_claude_response(
             "Dear Hiring Manager,\n\nI am excited to apply for the Senior Software Engineer position at TechCorp..."
         )
         
@@ -410,7 +431,7 @@ class TestAnalysisWorkflow:
             }
             
             # Initialize progress tracking
-            service.job_progress[analysis_id] = []
+            service.job_progress[analysis_id] = {}
             for step in AnalysisStep:
                 config = service.STEP_CONFIG[step]
                 progress = AnalysisProgress(
@@ -420,7 +441,7 @@ class TestAnalysisWorkflow:
                     status=AnalysisStatus.PENDING,
                     progress_percentage=config["progress_percentage"]
                 )
-                service.job_progress[analysis_id].append(progress)
+                service.job_progress[analysis_id][step] = progress
             
             # Execute individual steps
             job_analysis = await service._execute_step_1_job_analysis(analysis_id, request)
@@ -456,6 +477,187 @@ class TestAnalysisWorkflow:
             assert self.mock_claude_service.analyze_resume.called
             assert self.mock_claude_service.generate_cover_letter.called
 
+    def _make_service(self):
+        with patch('services.job_analysis_service.get_file_service'), \
+             patch('services.job_analysis_service.get_claude_service', return_value=self.mock_claude_service), \
+             patch('services.job_analysis_service.get_resume_parser', return_value=self.mock_resume_parser):
+            return JobAnalysisService()
+    
+    def _register_job(self, service, analysis_id):
+        request = AnalysisRequest(
+            session_id="test_session",
+            user_id="test_user",
+            job_description="Senior Software Engineer position at TechCorp requiring Python, React, and 5+ years experience in web development.",
+            resume_text="John Doe, Software Engineer with 5 years Python experience."
+        )
+        service.active_jobs[analysis_id] = {
+            "request": request,
+            "status": AnalysisStatus.PENDING,
+            "started_at": datetime.now(timezone.utc),
+            "started_monotonic": time.monotonic(),
+            "updated_at": datetime.now(timezone.utc)
+        }
+        service.job_progress[analysis_id] = {
+            step: AnalysisProgress(
+                step=step,
+                step_number=config["step_number"],
+                step_name=config["step_name"],
+                status=AnalysisStatus.PENDING,
+                progress_percentage=config["progress_percentage"]
+            )
+            for step, config in service.STEP_CONFIG.items()
+        }
+        return request
+    
+    @pytest.mark.asyncio
+    async def test_resume_parsing_converts_records(self):
+        """Parsed resume records are converted to plain dicts"""
+        parsed = ParsedResume(
+            raw_text="resume",
+            contact_info=ContactInfo(email="jane@example.com"),
+            work_experience=[WorkExperience(company="TechCorp", position="Engineer", technologies=["Python"])],
+            education=[Education(institution="MIT", degree="BSc")],
+            projects=[Project(name="Site", description="Portfolio")],
+            skills=["Python"]
+        )
+        self.mock_resume_parser.parse_resume.return_value = parsed
+        service = self._make_service()
+        request = self._register_job(service, "test_records")
+        
+        parsed_resume = await service._execute_step_3_resume_parsing("test_records", request)
+        
+        assert parsed_resume["contact_info"] == asdict(parsed.contact_info)
+        assert parsed_resume["work_experience"] == [asdict(exp) for exp in parsed.work_experience]
+        assert parsed_resume["education"] == [asdict(edu) for edu in parsed.education]
+        assert parsed_resume["projects"] == [asdict(proj) for proj in parsed.projects]
+        assert parsed_resume["_metadata"]["work_experiences"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_fenced_json_response_is_parsed(self):
+        """JSON wrapped in a code fence is parsed, not kept as raw text"""
+        service = self._make_service()
+        request = self._register_job(service, "test_fenced")
+        self.mock_claude_service.analyze_job_description.return_value = make_claude_response(
+            '```json\n{"job_title": "Data Engineer", "company_name": "DataCorp"}\n```'
+        )
+        
+        job_analysis = await service._execute_step_1_job_analysis("test_fenced", request)
+        
+        assert job_analysis["job_title"] == "Data Engineer"
+        assert "raw_analysis" not in job_analysis
+    
+    @pytest.mark.asyncio
+    async def test_unstructured_response_falls_back(self):
+        """A response that is not JSON is kept as raw analysis text"""
+        service = self._make_service()
+        request = self._register_job(service, "test_raw")
+        self.mock_claude_service.analyze_job_description.return_value = make_claude_response("Plain text analysis")
+        
+        job_analysis = await service._execute_step_1_job_analysis("test_raw", request)
+        
+        assert job_analysis["raw_analysis"] == "Plain text analysis"
+        assert job_analysis["job_title"] == "Position Title Not Extracted"
+    
+    @pytest.mark.asyncio
+    async def test_company_research_skips_unidentified_company(self):
+        """Placeholder company names don't trigger a research call"""
+        service = self._make_service()
+        request = self._register_job(service, "test_no_company")
+        
+        for job_analysis in ({}, {"company_name": "Company Not Identified"}, {"company_name": "  "}):
+            company_research = await service._execute_step_2_company_research("test_no_company", request, job_analysis)
+            assert company_research["company_name"] == "Not specified"
+            assert company_research["_metadata"] == {"research_method": "fallback", "company_identified": False}
+        
+        assert not self.mock_claude_service.research_company.called
+        progress = service.job_progress["test_no_company"][AnalysisStep.COMPANY_RESEARCH]
+        assert progress.status == AnalysisStatus.COMPLETED
+    
+    @pytest.mark.asyncio
+    async def test_process_analysis_overlaps_independent_steps(self):
+        """Company research starts while resume parsing is still running"""
+        service = self._make_service()
+        self._register_job(service, "test_dag")
+        
+        release_resume = asyncio.Event()
+        company_started = asyncio.Event()
+        original_step_2 = service._execute_step_2_company_research
+        original_step_3 = service._execute_step_3_resume_parsing
+        
+        async def step_2(*args):
+            company_started.set()
+            return await original_step_2(*args)
+        
+        async def step_3(*args):
+            await release_resume.wait()
+            return await original_step_3(*args)
+        
+        service._execute_step_2_company_research = step_2
+        service._execute_step_3_resume_parsing = step_3
+        
+        processing = asyncio.create_task(service._process_analysis("test_dag"))
+        await asyncio.wait_for(company_started.wait(), timeout=1)
+        release_resume.set()
+        await processing
+        
+        assert service.active_jobs["test_dag"]["status"] == AnalysisStatus.COMPLETED
+        result = service.get_result("test_dag")
+        assert result.company_research["company_name"] == "TechCorp"
+        assert "Dear Hiring Manager" in result.cover_letter["content"]
+        assert result.processing_metadata["total_processing_time"] >= 0
+        assert result.completed_at >= result.created_at
+        assert all(p.status == AnalysisStatus.COMPLETED for p in service.job_progress["test_dag"].values())
+        with pytest.raises(FrozenInstanceError):
+            result.cover_letter = {}
+    
+    @pytest.mark.asyncio
+    async def test_skills_failure_skips_resume_enhancement(self):
+        """Resume enhancement never calls Claude when skills analysis fails"""
+        service = self._make_service()
+        self._register_job(service, "test_skills_fail")
+        self.mock_claude_service.analyze_skills_gap.side_effect = ClaudeAPIError("Skills down")
+        
+        await asyncio.wait_for(service._process_analysis("test_skills_fail"), timeout=1)
+        
+        progress = service.job_progress["test_skills_fail"]
+        assert service.active_jobs["test_skills_fail"]["status"] == AnalysisStatus.FAILED
+        assert progress[AnalysisStep.SKILLS_ANALYSIS].status == AnalysisStatus.FAILED
+        assert progress[AnalysisStep.RESUME_ENHANCEMENT].status == AnalysisStatus.PENDING
+        assert not self.mock_claude_service.analyze_resume.called
+    
+    @pytest.mark.asyncio
+    async def test_process_analysis_failure_cancels_running_steps(self):
+        """A failed step cancels sibling steps that are still in flight"""
+        service = self._make_service()
+        self._register_job(service, "test_fail")
+        self.mock_claude_service.analyze_job_description.side_effect = ClaudeAPIError("API down")
+        
+        resume_cancelled = asyncio.Event()
+        
+        async def step_3(*args):
+            await service._update_step_status("test_fail", AnalysisStep.RESUME_PARSING, AnalysisStatus.PROCESSING)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                resume_cancelled.set()
+                raise
+        
+        service._execute_step_3_resume_parsing = step_3
+        
+        await asyncio.wait_for(service._process_analysis("test_fail"), timeout=1)
+        assert resume_cancelled.is_set()
+        
+        job = service.active_jobs["test_fail"]
+        assert job["status"] == AnalysisStatus.FAILED
+        assert "API down" in job["error"]
+        failed_step = service.job_progress["test_fail"][AnalysisStep.JOB_ANALYSIS]
+        assert failed_step.status == AnalysisStatus.FAILED
+        assert "API down" in failed_step.error_message
+        cancelled_step = service.job_progress["test_fail"][AnalysisStep.RESUME_PARSING]
+        assert cancelled_step.status == AnalysisStatus.CANCELLED
+        assert service.job_progress["test_fail"][AnalysisStep.COMPANY_RESEARCH].status == AnalysisStatus.PENDING
+        assert not self.mock_claude_service.research_company.called
+
 
 if __name__ == "__main__":
     # Simple test runner for development
@@ -486,7 +688,7 @@ if __name__ == "__main__":
                 "started_at": datetime.now(timezone.utc),
                 "updated_at": datetime.now(timezone.utc)
             }
-            service.job_progress[analysis_id] = []
+            service.job_progress[analysis_id] = {}
             
             progress_data = service.get_progress(analysis_id)
             assert progress_data["analysis_id"] == analysis_id
@@ -0,0 +1,9 @@
+"""
+Compatibility helpers for the Python versions CareerCraft AI supports.
+"""
+
+import sys
+
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+;
+# use as @dataclass(**DATACLASS_SLOTS)
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}